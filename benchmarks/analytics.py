@@ -0,0 +1,79 @@
+# benchmarks/analytics.py
+
+"""Cost of the scores analytics snapshot: full load, refresh and report.
+
+The benchmark recreates the tables of the configured database, so point it
+at a test database. Usage, from the repository root:
+
+    APP_SETTINGS=project.config.TestingConfig \\
+    DATABASE_TEST_URL=postgresql://postgres@localhost/scores_test \\
+        python benchmarks/analytics.py --users 100000 --exercises 20
+"""
+
+
+import argparse
+import os
+import sys
+import time
+
+
+SERVICES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'services')
+
+
+def timed(name, func):
+    started = time.perf_counter()
+    result = func()
+    print('{0:<28} {1:9.1f} ms'.format(
+        name, (time.perf_counter() - started) * 1000))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--exercises', type=int, default=20)
+    parser.add_argument('--changes', type=int, default=1000,
+                        help='scores written between refreshes')
+    args = parser.parse_args()
+    os.environ.setdefault('APP_SETTINGS', 'project.config.TestingConfig')
+    sys.path.insert(0, os.path.join(SERVICES_DIR, 'scores'))
+
+    from project import create_app, db
+    from project.api.analytics import ScoreSnapshot
+    from project.api.models import Score
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(
+            'INSERT INTO scores (user_id, exercise_id, correct) '
+            'SELECT u, e, random() < 0.5 '
+            'FROM generate_series(1, :users) u, '
+            'generate_series(1, :exercises) e',
+            {'users': args.users, 'exercises': args.exercises}
+        )
+        db.session.commit()
+        db.session.execute('ANALYZE')
+        db.session.commit()
+
+        snapshot = ScoreSnapshot()
+        print('{0} score rows'.format(args.users * args.exercises))
+        timed('full load', snapshot.refresh)
+        timed('report', snapshot.report)
+        for user_id in range(1, args.changes + 1):
+            Score.upsert(user_id, 1, True)
+            Score.upsert(user_id, args.exercises + 1, True)
+        db.session.commit()
+        rows = timed('refresh ({0} changes)'.format(2 * args.changes),
+                     snapshot.refresh)
+        print('rows read by refresh: {0}'.format(rows))
+        timed('report', snapshot.report)
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
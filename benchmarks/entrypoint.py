@@ -0,0 +1,112 @@
+# benchmarks/entrypoint.py
+
+"""Startup and request-latency benchmark for the WSGI entry points.
+
+Compares the legacy entry point (``manage:app``, which started the coverage
+tracer at import time) with ``wsgi:app``. Every trial runs in a fresh
+interpreter so that import and ``create_app()`` time are measured cold.
+
+Usage, from the repository root:
+
+    APP_SETTINGS=project.config.ProductionConfig \\
+        python benchmarks/entrypoint.py users --trials 5 --requests 2000
+"""
+
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+SERVICES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'services')
+
+# routes that do not need a database or an upstream service
+ROUTES = {
+    'users': '/users/ping',
+    'exercises': '/base/ping',
+    'scores': '/scores/ping',
+}
+
+TRIAL = '''
+import json
+import time
+
+started = time.perf_counter()
+if {legacy!r}:
+    import coverage
+    COV = coverage.coverage(
+        branch=True,
+        include='project/*',
+        omit=['project/tests/*', 'project/config.py']
+    )
+    COV.start()
+from project import create_app
+app = create_app()
+startup = time.perf_counter() - started
+
+client = app.test_client()
+for _ in range(50):
+    client.get({route!r})
+timings = []
+for _ in range({requests}):
+    started = time.perf_counter()
+    client.get({route!r})
+    timings.append(time.perf_counter() - started)
+print(json.dumps({{'startup': startup, 'timings': timings}}))
+'''
+
+
+def run_trial(service, route, requests, legacy):
+    code = TRIAL.format(legacy=legacy, route=route, requests=requests)
+    output = subprocess.check_output(
+        [sys.executable, '-c', code],
+        cwd=os.path.join(SERVICES_DIR, service),
+        env=dict(os.environ),
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def summarize(name, trials):
+    startup = [t['startup'] * 1000 for t in trials]
+    timings = sorted(
+        timing * 1000 for t in trials for timing in t['timings'])
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print('{0:<14} startup {1:8.1f} ms   request mean {2:7.3f} ms   '
+          'p50 {3:7.3f} ms   p99 {4:7.3f} ms'.format(
+              name,
+              statistics.median(startup),
+              statistics.mean(timings),
+              statistics.median(timings),
+              p99))
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('service', choices=sorted(ROUTES))
+    parser.add_argument('--route')
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+    os.environ.setdefault('APP_SETTINGS', 'project.config.ProductionConfig')
+    route = args.route or ROUTES[args.service]
+
+    print('{0}: {1} trials x {2} requests to {3}'.format(
+        args.service, args.trials, args.requests, route))
+    results = {}
+    for name, legacy in (('manage:app', True), ('wsgi:app', False)):
+        trials = [
+            run_trial(args.service, route, args.requests, legacy)
+            for _ in range(args.trials)
+        ]
+        results[name] = summarize(name, trials)
+    print('request speedup: {0:.2f}x'.format(
+        results['manage:app'] / results['wsgi:app']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/leaderboard.py
+
+"""Top-N leaderboard read latency with millions of score rows.
+
+Compares a GROUP BY over ``scores`` with the top-N scan of the
+``user_summaries`` index that serves GET /scores/leaderboard.
+
+The benchmark recreates the tables of the configured database, so point it
+at a test database. Usage, from the repository root:
+
+    APP_SETTINGS=project.config.TestingConfig \\
+    DATABASE_TEST_URL=postgresql://postgres@localhost/scores_test \\
+        python benchmarks/leaderboard.py --users 100000 --exercises 20
+"""
+
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+
+SERVICES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'services')
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--exercises', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    os.environ.setdefault('APP_SETTINGS', 'project.config.TestingConfig')
+    sys.path.insert(0, os.path.join(SERVICES_DIR, 'scores'))
+
+    from sqlalchemy import func, select
+
+    from project import create_app, db
+    from project.api.models import Score, UserSummary, rebuild_summaries
+    from project.api.utils import fetch_json, select_json
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(
+            'INSERT INTO scores (user_id, exercise_id, correct) '
+            'SELECT u, e, random() < 0.5 '
+            'FROM generate_series(1, :users) u, '
+            'generate_series(1, :exercises) e',
+            {'users': args.users, 'exercises': args.exercises}
+        )
+        rebuild_summaries()
+        db.session.commit()
+        db.session.execute('ANALYZE')
+        db.session.commit()
+
+        def group_by():
+            fetch_json(
+                select([Score.user_id,
+                        func.count().filter(Score.correct).label('correct')])
+                .group_by(Score.user_id)
+                .order_by(func.count().filter(Score.correct).desc(),
+                          Score.user_id)
+                .limit(args.limit)
+            )
+
+        def summaries():
+            fetch_json(
+                select_json(UserSummary)
+                .order_by(UserSummary.correct.desc(), UserSummary.user_id)
+                .limit(args.limit)
+            )
+
+        print('{0} score rows, top {1}, median of {2} runs'.format(
+            args.users * args.exercises, args.limit, args.repeat))
+        for name, read in (('group by scores', group_by),
+                           ('summaries index', summaries)):
+            print('{0:<16} {1:9.3f} ms'.format(
+                name, timed(read, args.repeat) * 1000))
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/read_path.py
+
+"""Per-row cost of the list endpoints' read path.
+
+Compares hydrating ORM instances and calling ``to_json`` with the
+column-only Core path (``fetch_json(select_json(model))``).
+
+The benchmark recreates the tables of the configured database, so point it
+at a test database. Usage, from the repository root:
+
+    APP_SETTINGS=project.config.TestingConfig \\
+    DATABASE_TEST_URL=postgresql://postgres@localhost/users_test \\
+        python benchmarks/read_path.py users --rows 100000
+"""
+
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+
+SERVICES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'services')
+
+# a bcrypt hash, so the users table is as wide as in production
+PASSWORD_HASH = (
+    '$2b$13$N0yzYzPz0iQ9O0i6S3x5Eu2QY7m6Wc0ZQe1f3Q8xg2m7b1H7p1mK6')
+
+
+def user_rows(count):
+    return [{
+        'username': 'user{0}'.format(i),
+        'email': 'user{0}@mail.com'.format(i),
+        'password': PASSWORD_HASH,
+        'active': True,
+        'admin': False,
+    } for i in range(count)]
+
+
+def exercise_rows(count):
+    return [{
+        'body': ('Define a function called sum that takes two integers as '
+                 'arguments and returns their sum.'),
+        'test_code': 'sum(2, {0})'.format(i),
+        'test_code_solution': str(2 + i),
+    } for i in range(count)]
+
+
+def score_rows(count):
+    return [{
+        'user_id': i % 1000,
+        'exercise_id': i,
+        'correct': i % 2 == 0,
+    } for i in range(count)]
+
+
+SERVICES = {
+    'users': ('User', user_rows),
+    'exercises': ('Exercise', exercise_rows),
+    'scores': ('Score', score_rows),
+}
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('service', choices=sorted(SERVICES))
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    os.environ.setdefault('APP_SETTINGS', 'project.config.TestingConfig')
+    sys.path.insert(0, os.path.join(SERVICES_DIR, args.service))
+
+    from project import create_app, db
+    from project.api import models
+    from project.api.utils import fetch_json, select_json
+
+    model_name, make_rows = SERVICES[args.service]
+    model = getattr(models, model_name)
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(model.__table__.insert(), make_rows(args.rows))
+        db.session.commit()
+
+        def orm():
+            rows = [obj.to_json() for obj in model.query.all()]
+            db.session.remove()
+            return rows
+
+        def core():
+            rows = fetch_json(select_json(model))
+            db.session.remove()
+            return rows
+
+        print('{0}: {1} rows, median of {2} runs'.format(
+            args.service, args.rows, args.repeat))
+        results = {}
+        for name, func in (('orm + to_json', orm), ('core tuples', core)):
+            elapsed, count = timed(func, args.repeat)
+            assert count == args.rows
+            results[name] = elapsed
+            print('{0:<14} {1:9.1f} ms total  {2:7.2f} us/row'.format(
+                name, elapsed * 1000, elapsed / count * 1e6))
+        print('speedup: {0:.2f}x'.format(
+            results['orm + to_json'] / results['core tuples']))
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
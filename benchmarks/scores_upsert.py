@@ -0,0 +1,111 @@
+# benchmarks/scores_upsert.py
+
+"""Concurrent PUT /scores/<exercise_id> for a single user and exercise.
+
+Runs many clients against one (user_id, exercise_id) pair and compares the
+old read-then-write path (SELECT, then UPDATE or INSERT, on a table without
+the unique index) with the single-statement ``Score.upsert``. Reports
+throughput, failed requests and how many rows the pair ends up with; the
+upsert should always leave exactly one.
+
+The benchmark recreates the scores table of the configured database, so
+point it at a test database. Usage, from the repository root:
+
+    APP_SETTINGS=project.config.TestingConfig \\
+    DATABASE_TEST_URL=postgresql://postgres@localhost/scores_test \\
+        python benchmarks/scores_upsert.py --clients 16 --requests 200
+"""
+
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+
+SERVICES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'services')
+
+USER_ID = 998877
+EXERCISE_ID = 1
+
+
+def read_then_write(db, Score, correct):
+    score = Score.query.filter_by(
+        user_id=USER_ID, exercise_id=EXERCISE_ID).first()
+    if score:
+        score.correct = correct
+    else:
+        db.session.add(Score(USER_ID, EXERCISE_ID, correct))
+    db.session.commit()
+
+
+def upsert(db, Score, correct):
+    Score.upsert(USER_ID, EXERCISE_ID, correct)
+    db.session.commit()
+
+
+def run(app, db, Score, write, clients, requests):
+    start = threading.Barrier(clients + 1)
+    errors = []
+
+    def client(n):
+        with app.app_context():
+            start.wait()
+            for i in range(requests):
+                try:
+                    write(db, Score, (n + i) % 2 == 0)
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(e)
+            db.session.remove()
+
+    threads = [threading.Thread(target=client, args=(n,))
+               for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='writes per client')
+    args = parser.parse_args()
+    os.environ.setdefault('APP_SETTINGS', 'project.config.TestingConfig')
+    sys.path.insert(0, os.path.join(SERVICES_DIR, 'scores'))
+
+    from project import create_app, db
+    from project.api.models import Score
+
+    app = create_app()
+    app.config['SQLALCHEMY_POOL_SIZE'] = args.clients
+    total = args.clients * args.requests
+    print('{0} clients x {1} writes to one (user, exercise) pair'.format(
+        args.clients, args.requests))
+    with app.app_context():
+        for name, write in (('read-then-write', read_then_write),
+                            ('upsert', upsert)):
+            db.drop_all()
+            db.create_all()
+            if write is read_then_write:
+                db.session.execute('DROP INDEX ix_scores_user_id_exercise_id')
+                db.session.commit()
+            elapsed, errors = run(
+                app, db, Score, write, args.clients, args.requests)
+            rows = Score.query.filter_by(
+                user_id=USER_ID, exercise_id=EXERCISE_ID).count()
+            db.session.remove()
+            print('{0:<16} {1:8.0f} writes/s  {2:5d} errors  {3:5d} rows'
+                  .format(name, total / elapsed, errors, rows))
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
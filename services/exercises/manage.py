@@ -15,9 +15,7 @@ COV = coverage.coverage(
         'project/config.py',
     ]
 )
-COV.start()
 
-app = create_app()
 cli = FlaskGroup(create_app=create_app)
 
 
@@ -34,6 +32,10 @@ def test():
 @cli.command()
 def cov():
     """Runs the unit tests with coverage."""
+    COV.start()
+    # re-import the app under the tracer so module-level code is measured
+    for name in [m for m in sys.modules if m.split('.')[0] == 'project']:
+        del sys.modules[name]
     tests = unittest.TestLoader().discover('project/tests')
     result = unittest.TextTestRunner(verbosity=2).run(tests)
     if result.wasSuccessful():
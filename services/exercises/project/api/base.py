@@ -3,7 +3,9 @@
 
 from flask import Blueprint, jsonify
 
-from project.api.utils import authenticate
+from project.api.introspection import token_cache
+from project.api.upstream import upstream
+from project.api.utils import authenticate, is_admin
 
 
 base_blueprint = Blueprint('base', __name__)
@@ -16,3 +18,21 @@ def ping_pong(resp):
         'status': 'success',
         'message': 'pong!'
     })
+
+
+@base_blueprint.route('/base/metrics', methods=['GET'])
+@authenticate
+def get_metrics(resp):
+    if not is_admin(resp):
+        response_object = {
+            'status': 'error',
+            'message': 'You do not have permission to do that.'
+        }
+        return jsonify(response_object), 401
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'upstream': upstream.metrics(),
+            'token_cache': token_cache.stats()
+        }
+    })
@@ -3,7 +3,7 @@ from flask import Blueprint, jsonify, request
 
 from project import db
 from project.api.models import Exercise
-from project.api.utils import authenticate
+from project.api.utils import authenticate, fetch_json, select_json
 
 exercises_blueprint = Blueprint('exercises', __name__)
 
@@ -14,7 +14,8 @@ def get_all_exercises():
     response_object = {
         'status': 'success',
         'data': {
-            'exercises': [ex.to_json() for ex in Exercise.query.all()]
+            'exercises': fetch_json(
+                select_json(Exercise).order_by(Exercise.id))
         }
     }
     return jsonify(response_object), 200
@@ -0,0 +1,122 @@
+# project/api/introspection.py
+
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from flask import current_app
+
+
+class Flight:
+    """A token lookup in progress that other threads can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class TokenCache:
+    """Caches /auth/status results per token within a worker.
+
+    Entries are keyed by a SHA-256 of the token and live for
+    AUTH_CACHE_TTL seconds, never past the token's own exp. Rejections
+    are kept for AUTH_CACHE_NEGATIVE_TTL seconds. Concurrent misses for
+    the same token wait for the first caller's upstream call instead of
+    making their own.
+    """
+
+    def __init__(self, timer=time.time):
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+        self.clear()
+
+    def get_or_load(self, token, load):
+        config = current_app.config
+        key = hashlib.sha256(token.encode()).hexdigest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._timer():
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight()
+                leader = True
+                self._counters['misses'] += 1
+            else:
+                leader = False
+                self._counters['collapsed'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = load(token)
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            self._store(key, token, flight.result, config)
+            return flight.result
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters = {
+                'hits': 0,
+                'misses': 0,
+                'collapsed': 0,
+            }
+
+    def stats(self):
+        with self._lock:
+            lookups = sum(self._counters.values())
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+            stats['hit_ratio'] = (
+                (lookups - self._counters['misses']) / lookups
+                if lookups else 0.0
+            )
+            return stats
+
+    def _store(self, key, token, result, config):
+        maxsize = config['AUTH_CACHE_SIZE']
+        if maxsize <= 0:
+            return
+        now = self._timer()
+        if result:
+            ttl = config['AUTH_CACHE_TTL']
+            try:
+                exp = jwt.decode(token, verify=False).get('exp')
+            except jwt.InvalidTokenError:
+                exp = None
+            if exp is not None:
+                ttl = min(ttl, exp - now)
+        else:
+            ttl = config['AUTH_CACHE_NEGATIVE_TTL']
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (now + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+
+token_cache = TokenCache()
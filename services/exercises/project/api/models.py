@@ -8,15 +8,12 @@ class Exercise(db.Model):
     test_code = db.Column(db.String, nullable=False)
     test_code_solution = db.Column(db.String, nullable=False)
 
+    json_columns = ('id', 'body', 'test_code', 'test_code_solution')
+
     def __init__(self, body, test_code, test_code_solution):
         self.body = body
         self.test_code = test_code
         self.test_code_solution = test_code_solution
 
     def to_json(self):
-        return {
-            'id': self.id,
-            'body': self.body,
-            'test_code': self.test_code,
-            'test_code_solution': self.test_code_solution
-        }
+        return {name: getattr(self, name) for name in self.json_columns}
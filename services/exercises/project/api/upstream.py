@@ -0,0 +1,111 @@
+# project/api/upstream.py
+
+
+import os
+import threading
+import time
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class UpstreamClient:
+    """Keep-alive HTTP session for calls to the other services.
+
+    Each worker process gets one requests.Session with a connection pool
+    of UPSTREAM_POOL_SIZE, so calls reuse TCP connections instead of
+    opening one per request. Every call gets a (UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_READ_TIMEOUT) timeout, and idempotent requests are retried
+    up to UPSTREAM_RETRIES times on connection errors and 502/503/504.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+        self.reset_metrics()
+
+    def get(self, url, **kwargs):
+        config = current_app.config
+        kwargs.setdefault('timeout', (
+            config['UPSTREAM_CONNECT_TIMEOUT'],
+            config['UPSTREAM_READ_TIMEOUT']
+        ))
+        started = time.perf_counter()
+        try:
+            return self.session().get(url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            self._record(time.perf_counter() - started)
+
+    def session(self):
+        with self._lock:
+            # a session inherited across fork() belongs to the parent
+            if self._session is None or self._pid != os.getpid():
+                self._session = self._build_session(current_app.config)
+                self._pid = os.getpid()
+            return self._session
+
+    def metrics(self):
+        with self._lock:
+            requests_made = self._requests
+            metrics = {
+                'requests': requests_made,
+                'errors': self._errors,
+                'latency_avg':
+                    self._latency / requests_made if requests_made else 0.0,
+                'latency_max': self._latency_max,
+                'pools': [],
+            }
+            session = self._session if self._pid == os.getpid() else None
+        if session is not None:
+            pools = session.get_adapter('http://').poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                metrics['pools'].append({
+                    'host': '{0}:{1}'.format(pool.host, pool.port),
+                    'connections_opened': pool.num_connections,
+                    'requests': pool.num_requests,
+                    'idle': sum(1 for conn in pool.pool.queue if conn),
+                    'maxsize': pool.pool.maxsize,
+                })
+        return metrics
+
+    def reset_metrics(self):
+        with self._lock:
+            self._requests = 0
+            self._errors = 0
+            self._latency = 0.0
+            self._latency_max = 0.0
+
+    def _build_session(self, config):
+        retries = Retry(
+            total=config['UPSTREAM_RETRIES'],
+            backoff_factor=config['UPSTREAM_BACKOFF'],
+            status_forcelist=(502, 503, 504),
+            method_whitelist=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=config['UPSTREAM_POOL_SIZE'],
+            pool_maxsize=config['UPSTREAM_POOL_SIZE'],
+            max_retries=retries
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _record(self, elapsed):
+        with self._lock:
+            self._requests += 1
+            self._latency += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+
+
+upstream = UpstreamClient()
@@ -9,6 +9,18 @@ class BaseConfig:
     DEBUG_TB_INTERCEPT_REDIRECTS = False
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_TRACK_MODIFICATIONS = False  # new
+    USERS_SERVICE_URL = os.environ.get('USERS_SERVICE_URL')
+    AUTH_LOCAL_VERIFY = True
+    AUTH_KEYS_TTL = 3600
+    AUTH_KEYS_MIN_REFRESH = 30
+    UPSTREAM_CONNECT_TIMEOUT = 1
+    UPSTREAM_READ_TIMEOUT = 3
+    UPSTREAM_RETRIES = 2
+    UPSTREAM_BACKOFF = 0.1
+    UPSTREAM_POOL_SIZE = 10
+    AUTH_CACHE_SIZE = 10000
+    AUTH_CACHE_TTL = 60
+    AUTH_CACHE_NEGATIVE_TTL = 5
 
 
 class DevelopmentConfig(BaseConfig):
@@ -2,6 +2,7 @@
 
 
 import json
+from unittest import mock
 
 from project.tests.base import BaseTestCase
 
@@ -26,3 +27,32 @@ class TestBaseBlueprint(BaseTestCase):
         self.assertEqual(response.status_code, 403)
         self.assertIn('Provide a valid auth token.', data['message'])
         self.assertIn('error', data['status'])
+
+    def test_metrics(self):
+        """Ensure the /metrics route reports upstream metrics."""
+        response = self.client.get(
+            '/base/metrics',
+            headers=dict(Authorization='Bearer test')
+        )
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('success', data['status'])
+        self.assertIn('latency_avg', data['data']['upstream'])
+        self.assertIn('pools', data['data']['upstream'])
+
+    def test_metrics_status_fallback(self):
+        """Ensure /metrics reads admin from an /auth/status response."""
+        for admin, code in ((True, 200), (False, 401)):
+            status = {
+                'status': 'success',
+                'message': 'success',
+                'data': {'id': 1, 'username': 'test', 'email': 'test@test.com',
+                         'active': True, 'admin': admin}
+            }
+            with mock.patch('project.api.utils.ensure_authenticated',
+                            return_value=status):
+                response = self.client.get(
+                    '/base/metrics',
+                    headers=dict(Authorization='Bearer test')
+                )
+            self.assertEqual(response.status_code, code)
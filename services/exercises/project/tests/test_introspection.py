@@ -0,0 +1,138 @@
+import datetime
+import threading
+import time
+import unittest
+
+import jwt
+from flask import current_app
+
+from project.api.introspection import TokenCache
+from project.tests.base import BaseTestCase
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def make_token(seconds):
+    payload = {
+        'exp': datetime.datetime.utcnow() +
+        datetime.timedelta(seconds=seconds),
+        'sub': 998877
+    }
+    return jwt.encode(payload, 'secret', algorithm='HS256').decode()
+
+
+class TestTokenCache(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.timer = FakeTimer()
+        self.cache = TokenCache(timer=self.timer)
+        self.loads = 0
+
+    def tearDown(self):
+        current_app.config.from_object('project.config.TestingConfig')
+        super().tearDown()
+
+    def load(self, result):
+        def loader(token):
+            self.loads += 1
+            return result
+        return loader
+
+    def test_hit(self):
+        token = make_token(300)
+        loader = self.load({'status': 'success'})
+        self.assertEqual(self.cache.get_or_load(token, loader),
+                         {'status': 'success'})
+        self.assertEqual(self.cache.get_or_load(token, loader),
+                         {'status': 'success'})
+        self.assertEqual(self.loads, 1)
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    def test_freshness_window(self):
+        token = make_token(300)
+        loader = self.load({'status': 'success'})
+        self.cache.get_or_load(token, loader)
+        self.timer.now += 61
+        self.cache.get_or_load(token, loader)
+        self.assertEqual(self.loads, 2)
+
+    def test_capped_by_exp(self):
+        token = make_token(10)
+        loader = self.load({'status': 'success'})
+        self.cache.get_or_load(token, loader)
+        self.timer.now += 11
+        self.cache.get_or_load(token, loader)
+        self.assertEqual(self.loads, 2)
+
+    def test_negative(self):
+        token = make_token(300)
+        loader = self.load(False)
+        self.assertFalse(self.cache.get_or_load(token, loader))
+        self.assertFalse(self.cache.get_or_load(token, loader))
+        self.assertEqual(self.loads, 1)
+        self.timer.now += 6
+        self.cache.get_or_load(token, loader)
+        self.assertEqual(self.loads, 2)
+
+    def test_errors_not_cached(self):
+        def failing(token):
+            self.loads += 1
+            raise ValueError('users service is down')
+        token = make_token(300)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.cache.get_or_load(token, failing)
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_lru_eviction(self):
+        current_app.config['AUTH_CACHE_SIZE'] = 1
+        first, second = make_token(300), make_token(301)
+        loader = self.load({'status': 'success'})
+        self.cache.get_or_load(first, loader)
+        self.cache.get_or_load(second, loader)
+        self.cache.get_or_load(first, loader)
+        self.assertEqual(self.loads, 3)
+
+    def test_single_flight(self):
+        token = make_token(300)
+        release = threading.Event()
+        results = []
+
+        def slow(token):
+            self.loads += 1
+            release.wait(5)
+            return {'status': 'success'}
+
+        def worker():
+            with self.app.app_context():
+                results.append(self.cache.get_or_load(token, slow))
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while self.cache.stats()['collapsed'] < 9:
+            if time.monotonic() > deadline:
+                release.set()
+                self.fail('Concurrent loads were not collapsed.')
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(results, [{'status': 'success'}] * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import datetime
+import unittest
+
+import jwt
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from project.api.keys import KeySet, verify_token
+from project.tests.base import BaseTestCase
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def generate_key():
+    return rsa.generate_private_key(
+        public_exponent=65537, key_size=2048, backend=default_backend())
+
+
+def make_token(key, kid='users-1', active=True, admin=False, seconds=30):
+    payload = {
+        'exp': datetime.datetime.utcnow() +
+        datetime.timedelta(seconds=seconds),
+        'iat': datetime.datetime.utcnow(),
+        'sub': 998877,
+        'active': active,
+        'admin': admin
+    }
+    return jwt.encode(
+        payload, key, algorithm='RS256', headers={'kid': kid}).decode()
+
+
+class TestLocalVerification(BaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.key = generate_key()
+        cls.other_key = generate_key()
+
+    def setUp(self):
+        super().setUp()
+        self.fetches = 0
+        self.published = {'users-1': self.key.public_key()}
+        self.timer = FakeTimer()
+        self.keys = KeySet(fetch=self.fetch, timer=self.timer)
+
+    def fetch(self):
+        self.fetches += 1
+        return dict(self.published)
+
+    def test_valid_token(self):
+        response = verify_token(make_token(self.key, admin=True), self.keys)
+        self.assertEqual(response['status'], 'success')
+        self.assertEqual(response['data']['id'], 998877)
+        self.assertTrue(response['data']['active'])
+        self.assertTrue(response['admin'])
+
+    def test_keys_fetched_once(self):
+        for _ in range(3):
+            self.assertTrue(verify_token(make_token(self.key), self.keys))
+        self.assertEqual(self.fetches, 1)
+
+    def test_inactive_user(self):
+        token = make_token(self.key, active=False)
+        self.assertFalse(verify_token(token, self.keys))
+
+    def test_expired_token(self):
+        token = make_token(self.key, seconds=-1)
+        self.assertFalse(verify_token(token, self.keys))
+
+    def test_forged_token(self):
+        token = make_token(self.other_key)
+        self.assertFalse(verify_token(token, self.keys))
+
+    def test_malformed_token(self):
+        self.assertFalse(verify_token('blah', self.keys))
+
+    def test_legacy_token_needs_upstream(self):
+        token = jwt.encode({'sub': 998877}, 'secret', algorithm='HS256')
+        self.assertIsNone(verify_token(token.decode(), self.keys))
+
+    def test_key_rotation(self):
+        verify_token(make_token(self.key), self.keys)
+        self.published['users-2'] = self.other_key.public_key()
+        token = make_token(self.other_key, kid='users-2')
+        # an unknown key id does not refetch more often than allowed
+        self.assertIsNone(verify_token(token, self.keys))
+        self.assertEqual(self.fetches, 1)
+        self.timer.now = 31
+        self.assertTrue(verify_token(token, self.keys))
+        self.assertEqual(self.fetches, 2)
+
+    def test_keys_expire(self):
+        verify_token(make_token(self.key), self.keys)
+        self.timer.now = 3601
+        verify_token(make_token(self.key), self.keys)
+        self.assertEqual(self.fetches, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
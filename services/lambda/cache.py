@@ -0,0 +1,127 @@
+import ast
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from handler import lambda_handler
+
+
+def normalize(source, mode='exec'):
+    """Source as a dump of its AST, or as is if it does not parse.
+
+    The dump leaves out comments, blank lines, indentation width and
+    source positions, so answers that only differ in those share a key.
+    """
+    try:
+        return ast.dump(ast.parse(source, mode=mode))
+    except (SyntaxError, ValueError):
+        return source
+
+
+def submission_key(answer, cases, many=False):
+    """Hash of an answer and its (test, solution) cases.
+
+    many tells whether the cases came as a tests list, which grades to a
+    list of results even when it holds a single case.
+    """
+    data = json.dumps([normalize(answer), many] + [
+        [normalize(test, 'eval'), solution] for test, solution in cases])
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class GradingCache:
+    """LRU cache of grading results by submission_key.
+
+    At most max_size results are held in memory. With a path, results
+    are also written to an SQLite database there, which is read on a
+    memory miss, so they survive restarts and are shared by processes
+    using the same file.
+    """
+
+    def __init__(self, max_size=10000, path=None):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, result TEXT NOT NULL)')
+            self._db.commit()
+        self._metrics = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def grade(self, event, grader=None):
+        """Grade event through the cache.
+
+        Answers found in the cache are not run at all; the rest are
+        graded with a single call to grader(event), lambda_handler by
+        default, and cached. If the grader raises, nothing is cached.
+        """
+        if 'tests' in event:
+            cases = [(case['test'], case['solution'])
+                     for case in event['tests']]
+        else:
+            cases = [(event['test'], event['solution'])]
+        answers = event['answers'] if 'answers' in event \
+            else [event['answer']]
+        keys = [submission_key(answer, cases, 'tests' in event)
+                for answer in answers]
+        results = [self.get(key) for key in keys]
+        missing = [n for n, result in enumerate(results) if result is None]
+        if missing:
+            batch = {key: event[key] for key in ('tests', 'test', 'solution')
+                     if key in event}
+            batch['answers'] = [answers[n] for n in missing]
+            graded = grader(batch) if grader is not None \
+                else lambda_handler(batch, None)
+            for n, result in zip(missing, graded):
+                self.set(keys[n], result)
+                results[n] = result
+        return results if 'answers' in event else results[0]
+
+    def get(self, key):
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self._metrics['hits'] += 1
+                return self._results[key]
+            result = None
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT result FROM results WHERE key = ?',
+                    (key,)).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._store(key, result)
+            self._metrics['hits' if result is not None else 'misses'] += 1
+            return result
+
+    def set(self, key, result):
+        with self._lock:
+            self._store(key, result)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO results (key, result) '
+                    'VALUES (?, ?)', (key, json.dumps(result)))
+                self._db.commit()
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['size'] = len(self._results)
+        return metrics
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _store(self, key, result):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if len(self._results) > self.max_size:
+            self._results.popitem(last=False)
+            self._metrics['evictions'] += 1
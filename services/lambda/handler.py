@@ -1,24 +1,125 @@
-import sys
-from io import StringIO
+def lambda_handler(event, context):
+    """Grade one or more answers against one or more test cases.
 
+    The event holds an answer (or a list of answers) and a test and
+    solution (or a list of tests, each a dict with a test and solution).
+    A single answer with a single test grades to True or False; a list
+    of tests grades to a list of results, and a list of answers to a
+    list with one result per answer.
+    """
+    if 'tests' in event:
+        cases = [(case['test'], case['solution']) for case in event['tests']]
+    else:
+        cases = [(event['test'], event['solution'])]
+    if 'answers' in event:
+        return [grade(answer, cases, 'tests' in event)
+                for answer in event['answers']]
+    return grade(event['answer'], cases, 'tests' in event)
 
-def lambda_handler(event, context):
-    # get code, test, and solution from payload
-    code = event['answer']
-    test = event['test']
-    solution = event['solution']
-    test_code = code + '\nprint(' + test + ')'
-    # capture stdout
-    buffer = StringIO()
-    sys.stdout = buffer
-    # execute code
-    try:
-        exec(test_code)
-    except Exception:
+
+def failed(event):
+    """The result of event when grading could not finish at all."""
+    def result():
+        return [False] * len(event['tests']) if 'tests' in event else False
+    if 'answers' in event:
+        return [result() for _ in event['answers']]
+    return result()
+
+
+def each_answer(event):
+    """The events grading each answer of a batch event on its own."""
+    single = {key: value for key, value in event.items() if key != 'answers'}
+    return [dict(single, answer=answer) for answer in event['answers']]
+
+
+def grade(code, cases, many):
+    results = run(code, cases)
+    return results if many else results[0]
+
+
+class OutputMismatch(BaseException):
+    """Raised into an answer once its output cannot match any more.
+
+    It is not an Exception, so a bare except Exception in the answer
+    does not swallow it.
+    """
+
+
+class OutputChecker:
+    """Stdout for a job that compares output with solutions as it comes.
+
+    Output passes a solution when, less its final character, it equals
+    the solution. Nothing written is kept: the checker only tracks how
+    much was written and which solutions still match, and raises
+    OutputMismatch from write as soon as none do.
+    """
+
+    def __init__(self, solutions, size=0):
+        self.solutions = solutions
+        self.size = size
+        self.matching = set(range(len(solutions)))
+
+    def write(self, text):
+        for n in list(self.matching):
+            if not continues(self.solutions[n], self.size, text):
+                self.matching.discard(n)
+        self.size += len(text)
+        if not self.matching:
+            raise OutputMismatch
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def passed(self, n):
+        solution = self.solutions[n]
+        return n in self.matching and (
+            self.size == len(solution) + 1 or not self.size and not solution)
+
+
+def continues(solution, start, text):
+    """Whether text written at start can still lead to solution."""
+    if start + len(text) > len(solution) + 1:
         return False
-    # return stdout
-    sys.stdout = sys.stdout
-    # check
-    if buffer.getvalue()[:-1] == solution:
-        return True
-    return False
\ No newline at end of file
+    return solution[start:start + len(text)] == text[:len(solution) - start]
+
+
+def run(code, cases):
+    """Execute code once and check each (test, solution) case against it.
+
+    A case passes when the output of the answer followed by the printed
+    value of its test, less the final newline, equals the solution, just
+    as if print(test) were appended to the answer. Cases run in order in
+    the same module namespace.
+
+    Output is captured by giving the answer its own print rather than
+    swapping sys.stdout, so any number of submissions can be graded at
+    once from threads or an event loop. It is checked as it is printed
+    rather than buffered, so an answer stops at its first wrong line
+    and a print loop can neither run on nor fill memory.
+    """
+    prelude = stdout = OutputChecker([solution for _, solution in cases])
+
+    def capture(*args, **kwargs):
+        if kwargs.get('file') is None:
+            kwargs['file'] = stdout
+        print(*args, **kwargs)
+
+    namespace = {'__name__': '__answer__', 'print': capture}
+    try:
+        exec(compile(code, '<answer>', 'exec'), namespace)
+    except (Exception, SystemExit, OutputMismatch):
+        return [False] * len(cases)
+    results = []
+    for n, (test, solution) in enumerate(cases):
+        if n not in prelude.matching:
+            results.append(False)
+            continue
+        stdout = OutputChecker([solution], prelude.size)
+        try:
+            capture(eval(compile(test, '<test>', 'eval'), namespace))
+        except (Exception, SystemExit, OutputMismatch):
+            results.append(False)
+            continue
+        results.append(stdout.passed(0))
+    return results
@@ -0,0 +1,191 @@
+import multiprocessing
+import os
+import queue
+import resource
+import threading
+
+from handler import failed, lambda_handler
+
+
+class QueueFull(Exception):
+    """Raised when the pool cannot take another grading job."""
+
+
+class GradingTimeout(Exception):
+    """Raised when a submission runs longer than the job timeout."""
+
+
+class GradingCrashed(Exception):
+    """Raised when a worker dies before it returns a job's result."""
+
+
+def work(connection, memory_limit, uid, gid):
+    """Grade events received on connection until it is closed.
+
+    Limits are set, and privileges dropped to uid and gid, before any
+    submission runs.
+    """
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    # submissions have no business writing files
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    if gid is not None:
+        os.setgroups([])
+        os.setgid(gid)
+    if uid is not None:
+        os.setuid(uid)
+        # nor starting processes; only enforced once we are not root
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    while True:
+        try:
+            event = connection.recv()
+        except EOFError:
+            return
+        try:
+            result = lambda_handler(event, None)
+        except BaseException:
+            # whatever escapes the handler fails this job only
+            result = failed(event)
+        connection.send(result)
+
+
+class Worker:
+    def __init__(self, context, memory_limit, uid, gid):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(
+            target=work, args=(child, memory_limit, uid, gid), daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+        self.dead = False
+
+    def stop(self):
+        self.connection.close()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+
+    def kill(self):
+        self.dead = True
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class WorkerPool:
+    """Grades submissions in a pool of pre-forked worker processes.
+
+    Each of the workers grades one job at a time. A job that runs longer
+    than timeout seconds has its worker killed and replaced, and a worker
+    is recycled after max_jobs jobs. At most queue_size jobs wait for a
+    free worker; further jobs raise QueueFull straight away. Workers are
+    forked from a forkserver with the handler already imported, so a
+    replacement starts quickly and does not inherit the caller's threads.
+
+    By default every job gets a fresh worker, as a submission can change
+    anything in its interpreter, down to the grading code itself, and so
+    forge the results of later jobs run there. Only raise max_jobs when
+    every submission is trusted.
+
+    Workers run under an address space limit, may not write files and,
+    given uid and gid, drop to that user and may not start processes.
+    This limits what a submission can do, but it is not a sandbox: a
+    worker can still read what its user can read and use the network,
+    so run the pool where neither exposes anything sensitive.
+    """
+
+    def __init__(self, workers=None, max_jobs=1, timeout=5,
+                 queue_size=64, memory_limit=256 * 1024 * 1024,
+                 uid=None, gid=None):
+        self.size = workers or os.cpu_count()
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.uid = uid
+        self.gid = gid
+        self._context = multiprocessing.get_context('forkserver')
+        self._context.set_forkserver_preload(['handler'])
+        self._slots = threading.BoundedSemaphore(self.size + queue_size)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = set()
+        self._metrics = {
+            'jobs': 0,
+            'timeouts': 0,
+            'crashes': 0,
+            'recycled': 0,
+            'rejected': 0,
+        }
+        for _ in range(self.size):
+            self._idle.put(self._start())
+
+    def grade(self, event):
+        """Grade event as one job.
+
+        All answers of a batch event share the job and its timeout, so
+        grade them one by one where one must not fail the others. Raises
+        GradingTimeout or GradingCrashed when the job does not finish;
+        neither says anything about the answers, so the caller decides
+        what they grade to.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise QueueFull('Too many submissions waiting to be graded.')
+        try:
+            worker = self._idle.get()
+            try:
+                return self._run(worker, event)
+            finally:
+                self._idle.put(self._recycle(worker))
+        finally:
+            self._slots.release()
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['workers'] = self.size
+        metrics['idle'] = self._idle.qsize()
+        return metrics
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, set()
+        for worker in workers:
+            worker.stop()
+
+    def _run(self, worker, event):
+        self._count('jobs')
+        worker.jobs += 1
+        try:
+            worker.connection.send(event)
+            if worker.connection.poll(self.timeout):
+                return worker.connection.recv()
+        except (EOFError, OSError):
+            # the worker died, most likely by hitting its memory limit
+            self._count('crashes')
+            worker.kill()
+            raise GradingCrashed('Worker died while grading.')
+        self._count('timeouts')
+        worker.kill()
+        raise GradingTimeout('Submission ran for more than {0}s.'.format(
+            self.timeout))
+
+    def _recycle(self, worker):
+        if not worker.dead and worker.jobs < self.max_jobs:
+            return worker
+        if not worker.dead:
+            self._count('recycled')
+            worker.stop()
+        with self._lock:
+            self._workers.discard(worker)
+        return self._start()
+
+    def _start(self):
+        worker = Worker(self._context, self.memory_limit, self.uid, self.gid)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _count(self, name):
+        with self._lock:
+            self._metrics[name] += 1
@@ -0,0 +1,172 @@
+"""Self-hosted grading service.
+
+Accepts the same JSON event as lambda_handler ({"answer", "test",
+"solution"}) on POST / and answers true or false, so it can stand in for
+the API gateway behind REACT_APP_API_GATEWAY_URL. Batches ("answers"
+and/or "tests" lists) answer with lists of results. Each answer of a batch
+is graded as a job of its own, so one that hangs or crashes fails only
+itself. Submissions are graded in a pool of resource-limited worker
+processes running as an unprivileged user; see pool.WorkerPool for what
+that does and does not prevent.
+
+Configured through the environment:
+
+    GRADER_PORT         port to listen on (5000)
+    GRADER_WORKERS      worker processes (one per core)
+    GRADER_MAX_JOBS     jobs per worker before it is replaced (1)
+    GRADER_TIMEOUT      seconds a submission may run (5)
+    GRADER_QUEUE_SIZE   jobs that may wait for a worker (64)
+    GRADER_MEMORY_MB    address space limit per worker (256)
+    GRADER_CACHE_SIZE   results cached in memory, 0 to disable (10000)
+    GRADER_CACHE_PATH   SQLite file to persist cached results in (unset)
+    GRADER_UID          user the workers run as (65534 when started as root)
+    GRADER_GID          group the workers run as (65534 when started as root)
+"""
+
+
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cache import GradingCache
+from handler import each_answer, failed
+from pool import GradingCrashed, GradingTimeout, QueueFull, WorkerPool
+
+
+MAX_BODY_SIZE = 64 * 1024
+
+
+def is_case(case):
+    return isinstance(case, dict) and all(
+        isinstance(case.get(key), str) for key in ('test', 'solution'))
+
+
+def valid_event(event):
+    """Return the grading fields of event, or None if it is malformed."""
+    if not isinstance(event, dict):
+        return None
+    valid = {}
+    if 'answers' in event:
+        answers = event['answers']
+        if not isinstance(answers, list) or \
+           not all(isinstance(answer, str) for answer in answers):
+            return None
+        valid['answers'] = answers
+    elif isinstance(event.get('answer'), str):
+        valid['answer'] = event['answer']
+    else:
+        return None
+    if 'tests' in event:
+        tests = event['tests']
+        if not isinstance(tests, list) or not all(map(is_case, tests)):
+            return None
+        valid['tests'] = [
+            {'test': case['test'], 'solution': case['solution']}
+            for case in tests]
+    elif is_case(event):
+        valid.update(test=event['test'], solution=event['solution'])
+    else:
+        return None
+    return valid
+
+
+class GradingHandler(BaseHTTPRequestHandler):
+    def do_OPTIONS(self):
+        self.send_json(204, None)
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            return self.send_json(404, {'message': 'Not found.'})
+        metrics = self.server.pool.metrics()
+        if self.server.cache is not None:
+            metrics['cache'] = self.server.cache.metrics()
+        self.send_json(200, metrics)
+
+    def do_POST(self):
+        try:
+            size = int(self.headers.get('Content-Length', 0))
+            if not 0 <= size <= MAX_BODY_SIZE:
+                raise ValueError
+            event = valid_event(json.loads(self.rfile.read(size).decode()))
+        except ValueError:
+            event = None
+        if event is None:
+            return self.send_json(400, {'message': 'Invalid payload.'})
+        try:
+            if 'answers' in event:
+                result = [self.grade(single) for single in each_answer(event)]
+            else:
+                result = self.grade(event)
+        except QueueFull:
+            return self.send_json(
+                503, {'message': 'Grader busy. Try again later.'},
+                {'Retry-After': '1'})
+        self.send_json(200, result)
+
+    def grade(self, event):
+        """Grade a single answer as one job, failing it if it does not finish.
+
+        Such a failure is not a result of the answer, so it is not cached.
+        """
+        try:
+            if self.server.cache is not None:
+                return self.server.cache.grade(event, self.server.pool.grade)
+            return self.server.pool.grade(event)
+        except (GradingCrashed, GradingTimeout):
+            return failed(event)
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode() if data is not None else b''
+        self.send_response(status)
+        # the client posts submissions straight from the browser
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if data is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_server(pool, port, cache=None):
+    server = ThreadingHTTPServer(('0.0.0.0', port), GradingHandler)
+    server.daemon_threads = True
+    server.pool = pool
+    server.cache = cache
+    return server
+
+
+def main():
+    env = os.environ.get
+    workers = env('GRADER_WORKERS')
+    # never run submissions as root
+    nobody = '65534' if os.geteuid() == 0 else None
+    uid = env('GRADER_UID', nobody)
+    gid = env('GRADER_GID', nobody)
+    pool = WorkerPool(
+        workers=int(workers) if workers else None,
+        max_jobs=int(env('GRADER_MAX_JOBS', 1)),
+        timeout=float(env('GRADER_TIMEOUT', 5)),
+        queue_size=int(env('GRADER_QUEUE_SIZE', 64)),
+        memory_limit=int(env('GRADER_MEMORY_MB', 256)) * 1024 * 1024,
+        uid=int(uid) if uid else None,
+        gid=int(gid) if gid else None
+    )
+    cache_size = int(env('GRADER_CACHE_SIZE', 10000))
+    cache = GradingCache(cache_size, env('GRADER_CACHE_PATH')) \
+        if cache_size else None
+    server = create_server(pool, int(env('GRADER_PORT', 5000)), cache)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        pool.close()
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == '__main__':
+    main()
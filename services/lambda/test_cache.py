@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+from cache import GradingCache, submission_key
+from handler import lambda_handler
+
+
+SUM = 'def sum(x, y):\n    return x + y'
+CASES = [('sum(2, 3)', '5')]
+
+
+class CountingGrader:
+    def __init__(self):
+        self.answers = []
+
+    def __call__(self, event):
+        self.answers.extend(event['answers'])
+        return lambda_handler(event, None)
+
+
+class TestSubmissionKey(unittest.TestCase):
+    def test_ignores_layout(self):
+        other = '# add\ndef sum(x,y):\n\n  return (x + y)  # done\n'
+        self.assertEqual(submission_key(SUM, CASES),
+                         submission_key(other, [('sum(2,3)', '5')]))
+
+    def test_differs(self):
+        key = submission_key(SUM, CASES)
+        self.assertNotEqual(
+            key, submission_key(SUM.replace('+', '-'), CASES))
+        self.assertNotEqual(key, submission_key(SUM, [('sum(2, 3)', '6')]))
+        self.assertNotEqual(key, submission_key(SUM, CASES + CASES))
+        self.assertNotEqual(key, submission_key(SUM, CASES, many=True))
+
+    def test_syntax_error(self):
+        self.assertNotEqual(submission_key('def sum(', CASES),
+                            submission_key('def sum(:', CASES))
+
+
+class TestGradingCache(unittest.TestCase):
+    def test_hit(self):
+        cache = GradingCache()
+        grader = CountingGrader()
+        event = {'answer': SUM, 'test': 'sum(2, 3)', 'solution': '5'}
+        self.assertIs(cache.grade(event, grader), True)
+        event['answer'] = 'def sum(x, y): return x+y'
+        self.assertIs(cache.grade(event, grader), True)
+        self.assertEqual(len(grader.answers), 1)
+        self.assertEqual(cache.metrics(),
+                         {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1})
+
+    def test_batch(self):
+        cache = GradingCache()
+        grader = CountingGrader()
+        tests = [{'test': 'sum(2, 3)', 'solution': '5'},
+                 {'test': 'sum(1, 1)', 'solution': '3'}]
+        cache.grade({'answer': SUM, 'tests': tests}, grader)
+        result = cache.grade({'answers': ['x', SUM, 'x'], 'tests': tests},
+                             grader)
+        self.assertEqual(result, [[False, False], [True, False],
+                                  [False, False]])
+        self.assertEqual(grader.answers, [SUM, 'x', 'x'])
+
+    def test_shape(self):
+        cache = GradingCache()
+        self.assertIs(cache.grade(
+            {'answer': SUM, 'test': 'sum(2, 3)', 'solution': '5'}), True)
+        self.assertEqual(cache.grade(
+            {'answer': SUM, 'tests': [
+                {'test': 'sum(2, 3)', 'solution': '5'}]}), [True])
+
+    def test_lru(self):
+        cache = GradingCache(max_size=2)
+        cache.set('a', True)
+        cache.set('b', True)
+        cache.get('a')
+        cache.set('c', False)
+        self.assertIsNone(cache.get('b'))
+        self.assertTrue(cache.get('a'))
+        self.assertFalse(cache.get('c'))
+        self.assertEqual(cache.metrics()['evictions'], 1)
+
+    def test_grader_error(self):
+        def grader(event):
+            raise RuntimeError
+        cache = GradingCache()
+        with self.assertRaises(RuntimeError):
+            cache.grade({'answer': SUM, 'test': '', 'solution': ''}, grader)
+        self.assertEqual(cache.metrics()['size'], 0)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.db')
+            event = {'answer': SUM, 'tests': [
+                {'test': 'sum(2, 3)', 'solution': '5'}]}
+            cache = GradingCache(path=path)
+            cache.grade(event)
+            cache.close()
+            cache = GradingCache(path=path)
+            grader = CountingGrader()
+            self.assertEqual(cache.grade(event, grader), [True])
+            self.assertEqual(grader.answers, [])
+            self.assertEqual(cache.metrics()['hits'], 1)
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
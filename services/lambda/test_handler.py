@@ -0,0 +1,195 @@
+import asyncio
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from handler import (
+    OutputChecker, OutputMismatch, each_answer, failed, lambda_handler
+)
+
+
+SUM = 'def sum(x, y):\n    return x + y'
+FACTORIAL = '''def factorial(n):
+    return 1 if n < 2 else n * factorial(n - 1)'''
+
+
+class TestLambdaHandler(unittest.TestCase):
+    def test_single(self):
+        event = {'answer': SUM, 'test': 'sum(2, 3)', 'solution': '5'}
+        self.assertIs(lambda_handler(event, None), True)
+        event['solution'] = '6'
+        self.assertIs(lambda_handler(event, None), False)
+
+    def test_recursive_answer(self):
+        event = {'answer': FACTORIAL, 'test': 'factorial(5)',
+                 'solution': '120'}
+        self.assertTrue(lambda_handler(event, None))
+
+    def test_answer_output(self):
+        event = {'answer': 'print("hi")\n' + SUM, 'test': 'sum(1, 1)',
+                 'solution': 'hi\n2'}
+        self.assertTrue(lambda_handler(event, None))
+
+    def test_errors(self):
+        event = {'answer': 'def sum(', 'test': 'sum(2, 3)', 'solution': '5'}
+        self.assertFalse(lambda_handler(event, None))
+        event = {'answer': SUM, 'test': 'sum(2)', 'solution': '5'}
+        self.assertFalse(lambda_handler(event, None))
+
+    def test_leaves_stdout_alone(self):
+        stdout = sys.stdout
+        event = {'answer': 'print("hi")', 'test': 'print("there")',
+                 'solution': 'hi\nthere\nNone'}
+        self.assertTrue(lambda_handler(event, None))
+        lambda_handler({'answer': 'raise ValueError', 'test': '1',
+                        'solution': '1'}, None)
+        self.assertIs(sys.stdout, stdout)
+
+    def test_print_to_stderr(self):
+        event = {'answer': 'import sys\nprint("x", file=sys.stderr)',
+                 'test': '1', 'solution': '1'}
+        stderr, sys.stderr = sys.stderr, __import__('io').StringIO()
+        try:
+            self.assertTrue(lambda_handler(event, None))
+            self.assertEqual(sys.stderr.getvalue(), 'x\n')
+        finally:
+            sys.stderr = stderr
+
+    def test_stops_printing_loop(self):
+        for answer in ('while True:\n    print("x")',
+                       'while True:\n    try:\n        print("x")\n'
+                       '    except Exception:\n        pass'):
+            event = {'answer': answer, 'test': '1', 'solution': 'x\nx\n1'}
+            self.assertFalse(lambda_handler(event, None))
+
+    def test_stops_at_first_wrong_line(self):
+        answer = 'print("a")\nprint("b")\nraise SystemExit'
+        event = {'answer': answer, 'tests': [
+            {'test': '1', 'solution': 'a\nc\n1'},
+            {'test': '1', 'solution': 'b\n1'},
+        ]}
+        self.assertEqual(lambda_handler(event, None), [False, False])
+        answer = 'def count():\n    while True:\n        print("x")'
+        event = {'answer': answer, 'test': 'count()', 'solution': 'x\nx'}
+        self.assertFalse(lambda_handler(event, None))
+
+    def test_many_tests(self):
+        event = {'answer': 'print("hi")\n' + SUM, 'tests': [
+            {'test': 'sum(2, 3)', 'solution': 'hi\n5'},
+            {'test': 'sum(2, 3)', 'solution': '5'},
+            {'test': 'sum("a")', 'solution': 'hi\na'},
+            {'test': 'print("x") or sum(1, 1)', 'solution': 'hi\nx\n2'},
+        ]}
+        self.assertEqual(lambda_handler(event, None),
+                         [True, False, False, True])
+
+    def test_answer_runs_once(self):
+        answer = 'calls = []\ndef f():\n    calls.append(1)\n    ' \
+            'return len(calls)'
+        event = {'answer': answer, 'tests': [
+            {'test': 'f()', 'solution': '1'},
+            {'test': 'f()', 'solution': '2'},
+        ]}
+        self.assertEqual(lambda_handler(event, None), [True, True])
+
+    def test_many_answers(self):
+        event = {'answers': [SUM, 'def sum(x, y):\n    return x - y', ')'],
+                 'test': 'sum(2, 3)', 'solution': '5'}
+        self.assertEqual(lambda_handler(event, None), [True, False, False])
+        event = {'answers': [SUM, ')'], 'tests': [
+            {'test': 'sum(2, 3)', 'solution': '5'},
+            {'test': 'sum(0, 0)', 'solution': '0'},
+        ]}
+        self.assertEqual(lambda_handler(event, None),
+                         [[True, True], [False, False]])
+
+    def test_each_answer(self):
+        tests = [{'test': 'sum(2, 3)', 'solution': '5'}]
+        self.assertEqual(each_answer({'answers': [SUM, ')'], 'tests': tests}),
+                         [{'answer': SUM, 'tests': tests},
+                          {'answer': ')', 'tests': tests}])
+
+    def test_failed(self):
+        self.assertIs(failed({'answer': SUM, 'test': '', 'solution': ''}),
+                      False)
+        self.assertEqual(failed({'answers': ['', ''], 'tests': [{}]}),
+                         [[False], [False]])
+
+
+class TestOutputChecker(unittest.TestCase):
+    def test_passed(self):
+        checker = OutputChecker(['ab', 'ac', 'abc'])
+        checker.write('a')
+        checker.write('b')
+        self.assertEqual(checker.matching, {0, 2})
+        checker.write('\n')
+        self.assertTrue(checker.passed(0))
+        self.assertFalse(checker.passed(2))
+
+    def test_mismatch(self):
+        checker = OutputChecker(['ab'])
+        checker.write('ab\n')
+        with self.assertRaises(OutputMismatch):
+            checker.write('x')
+        self.assertFalse(checker.passed(0))
+
+    def test_start(self):
+        checker = OutputChecker(['hi\n5'], size=3)
+        checker.write('5\n')
+        self.assertTrue(checker.passed(0))
+
+    def test_empty(self):
+        self.assertTrue(OutputChecker(['']).passed(0))
+        self.assertFalse(OutputChecker(['a']).passed(0))
+
+
+def concurrent_event(n):
+    # every job prints its own number while the others are running
+    answer = ('import time\n'
+              'def echo(n):\n'
+              '    for _ in range(5):\n'
+              '        print(n)\n'
+              '        time.sleep(0.001)\n'
+              '    return n\n'
+              'print("start", {0})').format(n)
+    output = 'start {0}'.format(n) + '\n{0}'.format(n) * 6
+    return {'answer': answer, 'tests': [
+        {'test': 'echo({0})'.format(n), 'solution': output},
+        {'test': 'echo({0})'.format(n + 1), 'solution': output},
+    ]}
+
+
+def mixed_up(results):
+    return [n for n, result in enumerate(results) if result != [True, False]]
+
+
+class TestConcurrentGrading(unittest.TestCase):
+    JOBS = 500
+
+    def test_threads(self):
+        stdout = sys.stdout
+        with ThreadPoolExecutor(max_workers=64) as executor:
+            results = list(executor.map(
+                lambda n: lambda_handler(concurrent_event(n), None),
+                range(self.JOBS)))
+        self.assertEqual(mixed_up(results), [])
+        self.assertIs(sys.stdout, stdout)
+
+    def test_asyncio(self):
+        async def grade_all(loop, executor):
+            return await asyncio.gather(*(
+                loop.run_in_executor(
+                    executor, lambda_handler, concurrent_event(n), None)
+                for n in range(self.JOBS)))
+
+        loop = asyncio.new_event_loop()
+        try:
+            with ThreadPoolExecutor(max_workers=64) as executor:
+                results = loop.run_until_complete(grade_all(loop, executor))
+        finally:
+            loop.close()
+        self.assertEqual(mixed_up(results), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
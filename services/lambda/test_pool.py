@@ -0,0 +1,216 @@
+import http.client
+import json
+import os
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from cache import GradingCache
+from pool import GradingCrashed, GradingTimeout, QueueFull, WorkerPool
+from server import create_server
+
+
+SUM = 'def sum(x, y):\n    return x + y'
+
+
+def event(answer=SUM, test='sum(2, 3)', solution='5'):
+    return {'answer': answer, 'test': test, 'solution': solution}
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = WorkerPool(workers=2, max_jobs=3, timeout=1,
+                               queue_size=1)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_grade(self):
+        self.assertTrue(self.pool.grade(event()))
+        self.assertFalse(self.pool.grade(event(solution='6')))
+        self.assertFalse(self.pool.grade(event(answer='def sum(')))
+        self.assertFalse(self.pool.grade(event(answer='exit()')))
+        self.assertTrue(self.pool.grade(event()))
+
+    def test_batch(self):
+        batch = {'answers': [SUM, 'exit()'], 'tests': [
+            {'test': 'sum(2, 3)', 'solution': '5'},
+            {'test': 'sum(1, 1)', 'solution': '2'},
+        ]}
+        self.assertEqual(self.pool.grade(batch),
+                         [[True, True], [False, False]])
+        self.assertEqual(self.pool.metrics()['jobs'], 1)
+
+    def test_timeout(self):
+        started = time.monotonic()
+        with self.assertRaises(GradingTimeout):
+            self.pool.grade(event(answer='while True:\n    pass'))
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual(self.pool.metrics()['timeouts'], 1)
+        for _ in range(4):
+            self.assertTrue(self.pool.grade(event()))
+
+    def test_crash(self):
+        with self.assertRaises(GradingCrashed):
+            self.pool.grade(event(answer='import os\nos._exit(1)'))
+        self.assertEqual(self.pool.metrics()['crashes'], 1)
+        self.assertTrue(self.pool.grade(event()))
+
+    def test_memory_limit(self):
+        self.assertFalse(self.pool.grade(event(answer='x = "x" * 2 ** 30')))
+        self.assertTrue(self.pool.grade(event()))
+
+    def test_recycle(self):
+        for _ in range(8):
+            self.assertTrue(self.pool.grade(event()))
+        metrics = self.pool.metrics()
+        self.assertGreaterEqual(metrics['recycled'], 2)
+        self.assertEqual(metrics['idle'], 2)
+
+    def test_fresh_worker_per_job(self):
+        pool = WorkerPool(workers=1, timeout=1)
+        self.addCleanup(pool.close)
+        forge = 'import handler\nhandler.run = lambda code, cases: ' \
+                '[True] * len(cases)'
+        self.assertFalse(pool.grade(event(answer=forge)))
+        self.assertFalse(pool.grade(event(solution='6')))
+        self.assertTrue(pool.grade(event()))
+
+    def test_queue_full(self):
+        hang = event(answer='import time\ntime.sleep(0.5)')
+        threads = [threading.Thread(target=self.pool.grade, args=(hang,))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        with self.assertRaises(QueueFull):
+            self.pool.grade(event())
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.pool.metrics()['rejected'], 1)
+        self.assertTrue(self.pool.grade(event()))
+
+    def test_scales_across_workers(self):
+        slow = event(answer='import time\ntime.sleep(0.3)\n' + SUM)
+        started = time.monotonic()
+        threads = [threading.Thread(target=self.pool.grade, args=(slow,))
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.monotonic() - started, 0.55)
+
+
+@unittest.skipUnless(os.geteuid() == 0, 'dropping privileges needs root')
+class TestUnprivilegedWorkers(unittest.TestCase):
+    def setUp(self):
+        self.pool = WorkerPool(workers=1, timeout=1, uid=65534, gid=65534)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_runs_as_user(self):
+        answer = 'import os\nuser = (os.getuid(), os.getgid(), os.getgroups())'
+        self.assertTrue(self.pool.grade(event(
+            answer=answer, test='user', solution='(65534, 65534, [])')))
+
+    def test_cannot_start_processes(self):
+        answer = 'import os\npid = os.fork()'
+        self.assertFalse(self.pool.grade(event(
+            answer=answer, test='pid > 0', solution='True')))
+        self.assertTrue(self.pool.grade(event()))
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.pool = WorkerPool(workers=1, timeout=1)
+        self.server = create_server(self.pool, 0, GradingCache())
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{0}/'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.pool.close()
+
+    def post(self, data):
+        request = urllib.request.Request(
+            self.url, data=json.dumps(data).encode(),
+            headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read().decode())
+
+    def test_grade(self):
+        self.assertEqual(self.post(event()), (200, True))
+        self.assertEqual(self.post(event(solution='6')), (200, False))
+        self.assertEqual(
+            self.post(event(answer='while True:\n    pass')), (200, False))
+
+    def test_batch(self):
+        tests = [{'test': 'sum(2, 3)', 'solution': '5'},
+                 {'test': 'sum(2, 3)', 'solution': '6'}]
+        self.assertEqual(self.post({'answer': SUM, 'tests': tests}),
+                         (200, [True, False]))
+        self.assertEqual(
+            self.post({'answers': ['while True:\n    pass'], 'tests': tests}),
+            (200, [[False, False]]))
+
+    def test_batch_answers_graded_apart(self):
+        answers = [SUM, 'while True:\n    pass', 'x = "x" * 2 ** 30', SUM]
+        self.assertEqual(
+            self.post({'answers': answers, 'test': 'sum(2, 3)',
+                       'solution': '5'}),
+            (200, [True, False, False, True]))
+        self.assertEqual(self.pool.metrics()['jobs'], 3)
+        self.assertEqual(self.pool.metrics()['timeouts'], 1)
+
+    def test_invalid_payload(self):
+        for payload in ({'answer': SUM}, [], {'answers': SUM, 'test': '',
+                        'solution': ''}, {'answer': SUM, 'tests': [{}]}):
+            with self.assertRaises(urllib.error.HTTPError) as error:
+                self.post(payload)
+            self.assertEqual(error.exception.code, 400)
+
+    def test_invalid_content_length(self):
+        connection = http.client.HTTPConnection(
+            '127.0.0.1', self.server.server_port, timeout=2)
+        for size in ('-1', '65537', 'x'):
+            connection.putrequest('POST', '/')
+            connection.putheader('Content-Length', size)
+            connection.endheaders(json.dumps(event()).encode())
+            response = connection.getresponse()
+            response.read()
+            self.assertEqual(response.status, 400)
+        connection.close()
+
+    def test_metrics(self):
+        self.post(event())
+        with urllib.request.urlopen(self.url + 'metrics') as response:
+            metrics = json.loads(response.read().decode())
+        self.assertEqual(metrics['jobs'], 1)
+        self.assertEqual(metrics['cache']['misses'], 1)
+
+    def test_cached(self):
+        self.assertEqual(self.post(event()), (200, True))
+        self.assertEqual(self.post(event()), (200, True))
+        self.assertEqual(self.pool.metrics()['jobs'], 1)
+
+    def test_failures_not_cached(self):
+        crash = 'import os\nos._exit(1)'
+        for answer in (crash, crash, 'while True:\n    pass'):
+            self.assertEqual(self.post(event(answer=answer)), (200, False))
+        self.assertEqual(
+            self.post({'answers': [SUM, crash], 'test': 'sum(2, 3)',
+                       'solution': '5'}),
+            (200, [True, False]))
+        self.assertEqual(self.pool.metrics()['jobs'], 5)
+        self.assertEqual(self.server.cache.metrics()['size'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
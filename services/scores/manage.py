@@ -5,12 +5,17 @@ import os
 import sys
 import unittest
 
-import requests
+import click
 import coverage
 from flask.cli import FlaskGroup
 
 from project import create_app, db
-from project.api.models import Score
+from project.api.models import (
+    create_attempt_partitions, rebuild_summaries, upgrade_schema
+)
+from project.seed import (
+    fetch_exercise_ids, fetch_user_pages, last_seeded_user, seed_scores
+)
 
 
 COV = coverage.coverage(
@@ -21,9 +26,7 @@ COV = coverage.coverage(
         'project/config.py',
     ]
 )
-COV.start()
 
-app = create_app()
 cli = FlaskGroup(create_app=create_app)
 
 
@@ -40,6 +43,10 @@ def test():
 @cli.command()
 def cov():
     """Runs the unit tests with coverage."""
+    COV.start()
+    # re-import the app under the tracer so module-level code is measured
+    for name in [m for m in sys.modules if m.split('.')[0] == 'project']:
+        del sys.modules[name]
     tests = unittest.TestLoader().discover('project/tests')
     result = unittest.TextTestRunner(verbosity=2).run(tests)
     if result.wasSuccessful():
@@ -60,24 +67,77 @@ def recreate_db():
     db.session.commit()
 
 
+@cli.command('dedupe_scores')
+def dedupe_scores():
+    """Drops duplicate scores and adds the (user_id, exercise_id) index."""
+    # keep the newest row of each pair
+    db.session.execute(
+        'DELETE FROM scores a USING scores b '
+        'WHERE a.user_id = b.user_id AND a.exercise_id = b.exercise_id '
+        'AND a.id < b.id'
+    )
+    db.session.execute(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ix_scores_user_id_exercise_id '
+        'ON scores (user_id, exercise_id)'
+    )
+    db.session.commit()
+
+
+@cli.command('upgrade_db')
+def upgrade_db():
+    """Upgrades an existing database to the current schema in place.
+
+    Run dedupe_scores first if the scores table has no unique
+    (user_id, exercise_id) index yet.
+    """
+    upgrade_schema()
+    db.session.commit()
+
+
 @cli.command('seed_db')
-def seed_db():
+@click.option('--page-size', default=1000,
+              help='Users fetched per page and written per transaction.')
+@click.option('--chunk-size', default=10000,
+              help='Scores streamed per COPY.')
+@click.option('--after', default=0,
+              help='Only seed users with a greater id.')
+@click.option('--resume', is_flag=True,
+              help='Continue after the highest user id already seeded.')
+def seed_db(page_size, chunk_size, after, resume):
     """Seeds the database."""
-    # get exercises
-    url = '{0}/exercises'.format(os.environ.get('EXERCISES_SERVICE_URL'))
-    response = requests.get(url)
-    exercises = response.json()['data']['exercises']
-    # get users
-    url = '{0}/users'.format(os.environ.get('USERS_SERVICE_URL'))
-    response = requests.get(url)
-    users = response.json()['data']['users']
-    # seed
-    for user in users:
-        for exercise in exercises:
-            db.session.add(Score(
-                user_id=user['id'],
-                exercise_id=exercise['id']
-            ))
+    if resume:
+        after = last_seeded_user()
+    exercise_ids = fetch_exercise_ids(os.environ.get('EXERCISES_SERVICE_URL'))
+    user_pages = fetch_user_pages(
+        os.environ.get('USERS_SERVICE_URL'), page_size, after)
+
+    def progress(users, created, last_user_id):
+        click.echo('{0} users, {1} scores created, last user id {2}'.format(
+            users, created, last_user_id))
+
+    seed_scores(user_pages, exercise_ids, chunk_size, progress)
+    rebuild_summaries()
+    db.session.commit()
+
+
+@cli.command('create_partitions')
+@click.option('--months', default=3,
+              help='Months of attempts partitions to create from now on.')
+def create_partitions(months):
+    """Creates the upcoming monthly attempts partitions.
+
+    Writes create them as needed, so this is only a backstop, e.g. run
+    from cron on the first of each month. It also moves attempts that
+    landed in the default partition into their month's new partition.
+    """
+    with db.engine.begin() as connection:
+        create_attempt_partitions(connection, months)
+
+
+@cli.command('rebuild_summaries')
+def rebuild_summaries_command():
+    """Recomputes the per-user and per-exercise score summaries."""
+    rebuild_summaries()
     db.session.commit()
 
 
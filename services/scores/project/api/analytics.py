@@ -0,0 +1,192 @@
+# project/api/analytics.py
+
+
+import tempfile
+import threading
+import time
+
+import numpy as np
+from flask import current_app
+
+from project import db
+
+
+PERCENTILES = (50, 90, 99)
+# keys up to this far past twice the row count are counted directly
+DENSE_KEY_SLACK = 1024
+
+
+# a row of COPY ... WITH (FORMAT binary) for the snapshot columns; none
+# are nullable, so every field has a fixed size
+COPY_RECORD = np.dtype([
+    ('fields', '>i2'),
+    ('id_size', '>i4'), ('id', '>i4'),
+    ('user_id_size', '>i4'), ('user_id', '>i4'),
+    ('exercise_id_size', '>i4'), ('exercise_id', '>i4'),
+    ('correct_size', '>i4'), ('correct', '?'),
+    ('revision_size', '>i4'), ('revision', '>i8'),
+])
+COPY_HEADER_SIZE = 19
+
+
+def copy_records(cursor, query, consume, batch_size):
+    """Run a binary COPY of query, handing rows on in batches.
+
+    The copy is spooled to a temporary file and read back batch_size rows
+    at a time as structured arrays, so the raw data never has to be held
+    in memory at once. Returns the number of rows read.
+    """
+    rows = 0
+    with tempfile.TemporaryFile() as spool:
+        cursor.copy_expert(
+            'COPY ({0}) TO STDOUT WITH (FORMAT binary)'.format(query), spool)
+        spool.seek(COPY_HEADER_SIZE)
+        while True:
+            # the short read at the end carries the 2-byte trailer
+            data = spool.read(batch_size * COPY_RECORD.itemsize)
+            count = len(data) // COPY_RECORD.itemsize
+            if not count:
+                return rows
+            consume(np.frombuffer(data, dtype=COPY_RECORD, count=count))
+            rows += count
+
+
+class ScoreSnapshot:
+    """Columnar copy of the scores table kept in each worker.
+
+    Scores are held as typed NumPy arrays sorted by id. A refresh only
+    reads rows whose revision is past the highest one already loaded,
+    less ANALYTICS_REVISION_OVERLAP to catch transactions that committed
+    out of revision order, and merges them in by id. The snapshot is
+    loaded from scratch once it is ANALYTICS_SNAPSHOT_MAX_AGE seconds
+    old.
+    """
+
+    def __init__(self, timer=time.monotonic):
+        self._timer = timer
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._reset(None)
+
+    def refresh(self):
+        """Bring the snapshot up to date; returns the rows read."""
+        config = current_app.config
+        with self._lock:
+            now = self._timer()
+            if self.loaded_at is None or \
+               now - self.loaded_at > config['ANALYTICS_SNAPSHOT_MAX_AGE']:
+                self._reset(now)
+            since = int(
+                self.revision - config['ANALYTICS_REVISION_OVERLAP'])
+            cursor = db.session.connection().connection.cursor()
+            try:
+                return copy_records(
+                    cursor,
+                    'SELECT id, user_id, exercise_id, correct, revision '
+                    'FROM scores WHERE revision > {0}'.format(since),
+                    self._merge,
+                    config['ANALYTICS_BATCH_SIZE']
+                )
+            finally:
+                cursor.close()
+
+    def _reset(self, now):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.user_ids = np.empty(0, dtype=np.int32)
+        self.exercise_ids = np.empty(0, dtype=np.int32)
+        self.correct = np.empty(0, dtype=np.bool_)
+        self.revision = 0
+        self.loaded_at = now
+
+    def _merge(self, records):
+        ids = records['id'].astype(np.int64)
+        user_ids = records['user_id']
+        exercise_ids = records['exercise_id']
+        correct = records['correct']
+        self.revision = max(self.revision, int(records['revision'].max()))
+        positions = np.searchsorted(self.ids, ids)
+        known = positions < len(self.ids)
+        known[known] = self.ids[positions[known]] == ids[known]
+        # only correct changes once a score exists
+        self.correct[positions[known]] = correct[known]
+        new = ~known
+        if not new.any():
+            return
+        self.ids = np.concatenate([self.ids, ids[new]])
+        self.user_ids = np.concatenate(
+            [self.user_ids, user_ids[new].astype(np.int32)])
+        self.exercise_ids = np.concatenate(
+            [self.exercise_ids, exercise_ids[new].astype(np.int32)])
+        self.correct = np.concatenate([self.correct, correct[new]])
+        if len(self.ids) > 1 and (np.diff(self.ids) < 0).any():
+            order = np.argsort(self.ids, kind='mergesort')
+            self.ids = self.ids[order]
+            self.user_ids = self.user_ids[order]
+            self.exercise_ids = self.exercise_ids[order]
+            self.correct = self.correct[order]
+
+    def report(self):
+        """Per-exercise pass rates and per-user distributions."""
+        with self._lock:
+            exercise_ids, attempted, correct = count_by(
+                self.exercise_ids, self.correct)
+            _, user_attempted, user_correct = count_by(
+                self.user_ids, self.correct)
+            user_correct = user_correct.astype(np.int64)
+            return {
+                'exercises': [{
+                    'exercise_id': int(exercise_id),
+                    'attempted': int(attempts),
+                    'correct': int(passes),
+                    'pass_rate': float(passes / attempts),
+                } for exercise_id, attempts, passes in zip(
+                    exercise_ids, attempted, correct)],
+                'users': {
+                    'count': len(user_attempted),
+                    'attempted': distribution(user_attempted),
+                    'correct': distribution(user_correct),
+                    # users by number of correct exercises
+                    'correct_histogram':
+                        np.bincount(user_correct).tolist(),
+                },
+                'snapshot': {
+                    'rows': len(self.ids),
+                    'revision': self.revision,
+                },
+            }
+
+
+def count_by(keys, weights):
+    """Distinct keys, how often each occurs and the sum of its weights.
+
+    Ids are normally small positive integers, which bincount counts
+    without sorting millions of rows. Any other key, such as a negative
+    id or one far past the number of rows, is first ranked with
+    np.unique, so memory stays proportional to the rows.
+    """
+    if not len(keys) or \
+       (keys.min() >= 0 and keys.max() < 2 * len(keys) + DENSE_KEY_SLACK):
+        counts = np.bincount(keys)
+        sums = np.bincount(keys, weights=weights)
+        groups = counts.nonzero()[0]
+        return groups, counts[groups], sums[groups]
+    groups, index = np.unique(keys, return_inverse=True)
+    return groups, np.bincount(index), np.bincount(index, weights=weights)
+
+
+def distribution(values):
+    if not len(values):
+        return {'mean': 0.0, 'percentiles': {}}
+    return {
+        'mean': float(values.mean()),
+        'percentiles': {
+            str(q): float(value) for q, value
+            in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+        },
+    }
+
+
+snapshot = ScoreSnapshot()
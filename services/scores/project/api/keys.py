@@ -0,0 +1,89 @@
+# project/api/keys.py
+
+
+import json
+import threading
+import time
+
+import jwt
+import requests
+from flask import current_app
+from jwt.algorithms import RSAAlgorithm
+
+from project.api.upstream import upstream
+
+
+def fetch_keys():
+    """Download the users service's token signing keys, by key id."""
+    url = '{0}/auth/keys'.format(current_app.config['USERS_SERVICE_URL'])
+    response = upstream.get(url)
+    response.raise_for_status()
+    return {
+        jwk['kid']: RSAAlgorithm.from_jwk(json.dumps(jwk))
+        for jwk in response.json()['keys']
+    }
+
+
+class KeySet:
+    """Public keys of the users service, fetched once and cached.
+
+    The set is refreshed after AUTH_KEYS_TTL seconds, or sooner when a
+    token names a key id we have not seen (the signing key was rotated),
+    but never more often than every AUTH_KEYS_MIN_REFRESH seconds.
+    """
+
+    def __init__(self, fetch=fetch_keys, timer=time.monotonic):
+        self._fetch = fetch
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._fetched_at = None
+
+    def get(self, kid):
+        config = current_app.config
+        with self._lock:
+            now = self._timer()
+            age = None if self._fetched_at is None else now - self._fetched_at
+            if age is None or age > config['AUTH_KEYS_TTL'] or (
+                    kid not in self._keys and
+                    age > config['AUTH_KEYS_MIN_REFRESH']):
+                try:
+                    self._keys = self._fetch()
+                except (requests.RequestException, KeyError, ValueError):
+                    pass
+                self._fetched_at = now
+            return self._keys.get(kid)
+
+
+key_set = KeySet()
+
+
+def verify_token(token, keys=key_set):
+    """Verify an RS256 auth token without calling the users service.
+
+    Returns the auth response for a valid token, False for a token that
+    must be rejected, and None when the token cannot be checked locally
+    (a legacy HS256 token, or no matching public key) and has to be
+    introspected upstream.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.InvalidTokenError:
+        return False
+    if header.get('alg') != 'RS256' or 'kid' not in header:
+        return None
+    key = keys.get(header['kid'])
+    if key is None:
+        return None
+    try:
+        claims = jwt.decode(token, key=key, algorithms=['RS256'])
+    except jwt.InvalidTokenError:
+        return False
+    if not claims.get('active'):
+        return False
+    admin = bool(claims.get('admin'))
+    return {
+        'status': 'success',
+        'data': {'id': claims['sub'], 'active': True, 'admin': admin},
+        'admin': admin
+    }
@@ -1,15 +1,38 @@
 # services/scores/project/api/models.py
 
 
+import datetime
+
+from flask import current_app
+from sqlalchemy import cast, event, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import BIT, insert
+
 from project import db
 
 
+# bumped on every insert and update of a score, so readers can pick up
+# changed rows incrementally
+revision_seq = db.Sequence('scores_revision_seq', metadata=db.Model.metadata)
+
+
 class Score(db.Model):
     __tablename__ = 'scores'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, nullable=False)
     exercise_id = db.Column(db.Integer, nullable=False)
     correct = db.Column(db.Boolean, nullable=False)
+    revision = db.Column(db.BigInteger, nullable=False, index=True,
+                         server_default=revision_seq.next_value())
+
+    __table_args__ = (
+        db.Index('ix_scores_user_id_exercise_id', 'user_id', 'exercise_id',
+                 unique=True),
+        # keyset pages of GET /scores filtered by user or exercise
+        db.Index('ix_scores_user_id_id', 'user_id', 'id'),
+        db.Index('ix_scores_exercise_id_id', 'exercise_id', 'id'),
+    )
+
+    json_columns = ('id', 'user_id', 'exercise_id', 'correct')
 
     def __init__(self, user_id, exercise_id, correct=False):
         self.user_id = user_id
@@ -17,9 +40,356 @@ class Score(db.Model):
         self.correct = correct
 
     def to_json(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'exercise_id': self.exercise_id,
-            'correct': self.correct
-        }
+        return {name: getattr(self, name) for name in self.json_columns}
+
+    @classmethod
+    def upsert(cls, user_id, exercise_id, correct):
+        """Insert or update the user's score in one statement.
+
+        Returns True when the row was created, False when an existing row
+        was updated. The caller commits.
+        """
+        changes = cls.upsert_many(user_id, {exercise_id: correct})
+        return changes.get(exercise_id, False)
+
+    @classmethod
+    def upsert_many(cls, user_id, scores):
+        """Insert or update several of the user's scores in one statement.
+
+        Takes a dict of exercise_id to correct and returns a dict of
+        exercise_id to whether that row was created, for the rows that
+        were created or changed. Summaries are updated to match. The
+        caller commits.
+        """
+        # rows are written, and their index entries locked, in exercise
+        # order, so concurrent batches from one user can't deadlock
+        statement = insert(cls.__table__).values([{
+            'user_id': user_id,
+            'exercise_id': exercise_id,
+            'correct': correct,
+        } for exercise_id, correct in sorted(scores.items())])
+        statement = statement.on_conflict_do_update(
+            index_elements=['user_id', 'exercise_id'],
+            set_={
+                'correct': statement.excluded.correct,
+                'revision': revision_seq.next_value()
+            },
+            # leave unchanged rows alone, so every returned update flips
+            where=cls.__table__.c.correct != statement.excluded.correct
+        ).returning(
+            cls.__table__.c.exercise_id,
+            # xmax is only zero on a freshly inserted row version
+            (literal_column('xmax') == 0).label('created'),
+            cls.__table__.c.correct
+        )
+        changes = db.session.execute(statement).fetchall()
+        record_scores(user_id, changes)
+        return {exercise_id: created
+                for exercise_id, created, correct in changes}
+
+
+class Attempt(db.Model):
+    """Every submitted answer, in submission order.
+
+    Rows are only ever inserted. The table is range partitioned by month
+    on created_date, so old months can be detached or dropped whole. The
+    first write of each month in a process creates the partitions for
+    that month and the next ATTEMPTS_PARTITIONS_AHEAD - 1.
+    """
+    __tablename__ = 'attempts'
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    # partitioned tables need the partition key in the primary key
+    created_date = db.Column(db.DateTime, primary_key=True,
+                             server_default=func.now())
+    user_id = db.Column(db.Integer, nullable=False)
+    exercise_id = db.Column(db.Integer, nullable=False)
+    correct = db.Column(db.Boolean, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_attempts_user_id_exercise_id_id',
+                 'user_id', 'exercise_id', 'id'),
+        {'postgresql_partition_by': 'RANGE (created_date)'},
+    )
+
+    json_columns = ('id', 'user_id', 'exercise_id', 'correct',
+                    'created_date')
+
+    @classmethod
+    def log(cls, user_id, attempts):
+        """Append (exercise_id, correct) attempts. The caller commits."""
+        ensure_attempt_partitions()
+        db.session.execute(cls.__table__.insert().values([{
+            'user_id': user_id,
+            'exercise_id': exercise_id,
+            'correct': correct,
+        } for exercise_id, correct in attempts]))
+
+
+def months_from(start, months):
+    """(first day, first day of next) for months months from start."""
+    year, month = start.year, start.month
+    for _ in range(months):
+        lower = datetime.date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        yield lower, datetime.date(year, month, 1)
+
+
+# advisory lock key serializing create_attempt_partitions across processes
+PARTITIONS_LOCK = 7311
+
+
+def create_attempt_partitions(connection, months=3, start=None):
+    """Create the monthly attempts partitions from start onwards.
+
+    Also creates a default partition, so an attempt outside every month
+    is still stored. Existing partitions are left alone. Postgres will
+    not create a partition while the default holds rows that belong in
+    it, so for such a month the default is detached, the partition is
+    created, the rows are moved into it and the default is attached
+    again, all in the caller's transaction.
+
+    Every worker runs this at month rollover, so it takes a transaction
+    advisory lock first and the check for each partition and its
+    creation happen one process at a time.
+    """
+    connection.execute(
+        text('SELECT pg_advisory_xact_lock(:key)'), key=PARTITIONS_LOCK)
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS attempts_default '
+        'PARTITION OF attempts DEFAULT')
+    for lower, upper in months_from(start or datetime.date.today(), months):
+        name = 'attempts_{0:%Y_%m}'.format(lower)
+        if connection.execute(
+                text('SELECT to_regclass(:name)'), name=name).scalar():
+            continue
+        stranded = connection.execute(text(
+            'SELECT EXISTS (SELECT 1 FROM attempts_default '
+            'WHERE created_date >= :lower AND created_date < :upper)'),
+            lower=lower, upper=upper).scalar()
+        if stranded:
+            connection.execute(
+                'ALTER TABLE attempts DETACH PARTITION attempts_default')
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS {0} PARTITION OF attempts "
+            "FOR VALUES FROM ('{1}') TO ('{2}')".format(name, lower, upper))
+        if stranded:
+            connection.execute(text(
+                'WITH moved AS (DELETE FROM attempts_default '
+                'WHERE created_date >= :lower AND created_date < :upper '
+                'RETURNING id, created_date, user_id, exercise_id, correct) '
+                'INSERT INTO attempts '
+                '(id, created_date, user_id, exercise_id, correct) '
+                'SELECT * FROM moved'), lower=lower, upper=upper)
+            connection.execute(
+                'ALTER TABLE attempts ATTACH PARTITION attempts_default '
+                'DEFAULT')
+
+
+# the month this process last made sure attempts partitions exist for
+partitions_checked = None
+
+
+def ensure_attempt_partitions(today=None):
+    """Create the upcoming attempts partitions, once a month per process.
+
+    Runs in a transaction of its own, so a partition is kept even if the
+    write that triggered it is rolled back.
+    """
+    global partitions_checked
+    month = (today or datetime.date.today()).replace(day=1)
+    if partitions_checked == month:
+        return
+    with db.engine.begin() as connection:
+        create_attempt_partitions(
+            connection, current_app.config['ATTEMPTS_PARTITIONS_AHEAD'],
+            month)
+    partitions_checked = month
+
+
+@event.listens_for(Attempt.__table__, 'after_create')
+def create_initial_partitions(target, connection, **kwargs):
+    create_attempt_partitions(connection)
+
+
+def save_scores(user_id, attempts):
+    """Log (exercise_id, correct) attempts and fold them into scores.
+
+    The last attempt for an exercise wins. Returns the same dict as
+    Score.upsert_many. The caller commits.
+    """
+    Attempt.log(user_id, attempts)
+    return Score.upsert_many(user_id, dict(attempts))
+
+
+class UserSummary(db.Model):
+    __tablename__ = 'user_summaries'
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    attempted = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    # bit n is set when the user has attempted, or solved, exercise n
+    attempted_bits = db.Column(BIT(varying=True), nullable=False,
+                               server_default='')
+    correct_bits = db.Column(BIT(varying=True), nullable=False,
+                             server_default='')
+
+    # the leaderboard reads the top of this index
+    __table_args__ = (
+        db.Index('ix_user_summaries_correct_user_id',
+                 correct.desc(), user_id),
+    )
+
+    json_columns = ('user_id', 'attempted', 'correct')
+
+
+class ExerciseSummary(db.Model):
+    __tablename__ = 'exercise_summaries'
+    exercise_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    attempted = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+
+    json_columns = ('exercise_id', 'attempted', 'correct')
+
+
+def record_scores(user_id, changes):
+    """Apply score writes to the summary tables in the current transaction.
+
+    changes holds (exercise_id, created, correct) for every score row that
+    was inserted, or updated so that correct flipped to the given value.
+    """
+    user = {'attempted': 0, 'correct': 0}
+    exercises = {}
+    for exercise_id, created, correct in changes:
+        if created:
+            delta = {'attempted': 1, 'correct': int(correct)}
+        else:
+            delta = {'attempted': 0, 'correct': 1 if correct else -1}
+        exercise = exercises.setdefault(
+            exercise_id, {'attempted': 0, 'correct': 0})
+        for name, value in delta.items():
+            user[name] += value
+            exercise[name] += value
+    if not exercises:
+        return
+    # ids past SCORES_MAX_EXERCISE_ID are counted but get no bit
+    max_id = current_app.config['SCORES_MAX_EXERCISE_ID']
+    progress = {
+        'attempted_bits': {exercise_id: 1
+                           for exercise_id, created, _ in changes
+                           if created and 0 <= exercise_id <= max_id},
+        'correct_bits': {exercise_id: int(correct)
+                         for exercise_id, _, correct in changes
+                         if 0 <= exercise_id <= max_id},
+    }
+    user.update({name: bit_string(bits) for name, bits in progress.items()})
+    add_to_summary(UserSummary, [dict(user, user_id=user_id)], progress)
+    # lock exercise rows in a fixed order so concurrent batches can't
+    # deadlock on each other
+    add_to_summary(ExerciseSummary, [
+        dict(exercises[exercise_id], exercise_id=exercise_id)
+        for exercise_id in sorted(exercises)
+    ])
+
+
+def add_to_summary(model, rows, progress=None):
+    """Add the counts in rows to the summaries, creating missing rows.
+
+    progress maps bit string columns to {exercise_id: bit} to set in them.
+    """
+    table = model.__table__
+    statement = insert(table).values(rows)
+    set_ = {
+        'attempted': table.c.attempted + statement.excluded.attempted,
+        'correct': table.c.correct + statement.excluded.correct,
+    }
+    for name, bits in (progress or {}).items():
+        if bits:
+            set_[name] = set_bits(table.c[name], bits)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.primary_key.columns.values()[0]],
+        set_=set_
+    )
+    db.session.execute(statement)
+
+
+def bit_string(bits):
+    """The bit string with {exercise_id: bit} set, as text."""
+    chars = ['0'] * (max(bits) + 1 if bits else 0)
+    for exercise_id, bit in bits.items():
+        chars[exercise_id] = str(bit)
+    return ''.join(chars)
+
+
+def set_bits(column, bits):
+    """SQL for column with {exercise_id: bit} set, extended as needed."""
+    padding = func.greatest(0, max(bits) + 1 - func.length(column))
+    expression = column.op('||')(
+        cast(func.repeat('0', padding), BIT(varying=True)))
+    for exercise_id, bit in sorted(bits.items()):
+        expression = func.set_bit(expression, exercise_id, bit)
+    return expression
+
+
+def rebuild_summaries():
+    """Recompute the summary tables from scores. The caller commits."""
+    # block score writes until the caller commits
+    db.session.execute('LOCK TABLE scores IN SHARE MODE')
+    for model, key in ((UserSummary, Score.user_id),
+                       (ExerciseSummary, Score.exercise_id)):
+        db.session.execute(model.__table__.delete())
+        db.session.execute(model.__table__.insert().from_select(
+            model.json_columns,
+            select([
+                key,
+                func.count(),
+                func.count().filter(Score.correct)
+            ]).group_by(key)
+        ))
+    # one bit per exercise, OR-ed together over each user's scores
+    db.session.execute(
+        'UPDATE user_summaries s '
+        'SET attempted_bits = b.attempted, correct_bits = b.correct '
+        'FROM (SELECT user_id, bit_or(bit) AS attempted, '
+        'bit_or(CASE WHEN correct THEN bit ELSE zero END) AS correct '
+        "FROM (SELECT user_id, correct, overlay(zero placing B'1' "
+        'from exercise_id + 1) AS bit, zero '
+        "FROM (SELECT user_id, exercise_id, correct, repeat('0', "
+        'max(exercise_id) OVER (PARTITION BY user_id) + 1)::varbit AS zero '
+        'FROM scores WHERE exercise_id BETWEEN 0 AND :max_id) padded) bits '
+        'GROUP BY user_id) b '
+        'WHERE s.user_id = b.user_id',
+        {'max_id': current_app.config['SCORES_MAX_EXERCISE_ID']}
+    )
+
+
+def upgrade_schema():
+    """Bring a database from before revisions and summaries up to date.
+
+    Adds and backfills scores.revision, adds the progress bitsets to an
+    existing user_summaries table, creates whatever tables, indexes and
+    attempts partitions are missing and rebuilds the summaries. It can
+    be run again safely. A database from before the unique (user_id,
+    exercise_id) index needs dedupe_scores first. The caller commits.
+    """
+    for statement in (
+        'CREATE SEQUENCE IF NOT EXISTS scores_revision_seq',
+        'ALTER TABLE scores ADD COLUMN IF NOT EXISTS revision BIGINT',
+        "UPDATE scores SET revision = nextval('scores_revision_seq') "
+        'WHERE revision IS NULL',
+        'ALTER TABLE scores ALTER COLUMN revision '
+        "SET DEFAULT nextval('scores_revision_seq')",
+        'ALTER TABLE scores ALTER COLUMN revision SET NOT NULL',
+        'CREATE INDEX IF NOT EXISTS ix_scores_revision ON scores (revision)',
+        'CREATE INDEX IF NOT EXISTS ix_scores_user_id_id '
+        'ON scores (user_id, id)',
+        'CREATE INDEX IF NOT EXISTS ix_scores_exercise_id_id '
+        'ON scores (exercise_id, id)',
+        'ALTER TABLE IF EXISTS user_summaries ADD COLUMN IF NOT EXISTS '
+        "attempted_bits BIT VARYING NOT NULL DEFAULT ''",
+        'ALTER TABLE IF EXISTS user_summaries ADD COLUMN IF NOT EXISTS '
+        "correct_bits BIT VARYING NOT NULL DEFAULT ''",
+    ):
+        db.session.execute(statement)
+    connection = db.session.connection()
+    db.Model.metadata.create_all(connection)
+    create_attempt_partitions(connection)
+    rebuild_summaries()
@@ -1,12 +1,21 @@
 # services/scores/project/api/scores.py
 
 
-from sqlalchemy import exc
-from flask import Blueprint, jsonify, request
+import base64
+
+from sqlalchemy import exc, select
+from flask import (
+    Blueprint, Response, current_app, jsonify, request, stream_with_context
+)
 
 from project import db
-from project.api.models import Score
-from project.api.utils import authenticate
+from project.api.analytics import snapshot
+from project.api.models import (
+    Attempt, ExerciseSummary, Score, UserSummary, record_scores, save_scores
+)
+from project.api.utils import (
+    authenticate, fetch_json, is_admin, select_json, stream_csv, stream_json
+)
 
 
 scores_blueprint = Blueprint('scores', __name__)
@@ -22,30 +31,296 @@ def ping_pong():
 
 @scores_blueprint.route('/scores', methods=['GET'])
 def get_all_scores():
-    """Get all scores"""
+    """Get all scores.
+
+    `user_id`, `exercise_id` and `correct` filter the scores. `limit` and
+    `after` page through them by id (keyset pagination); without `limit`
+    every matching score is returned in one payload.
+    """
+    response_object = {
+        'status': 'fail',
+        'message': 'Invalid pagination parameters.'
+    }
+    try:
+        limit = request.args.get('limit')
+        if limit is not None:
+            limit = int(limit)
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify(response_object), 400
+    if (limit is not None and limit < 1) or after < 0:
+        return jsonify(response_object), 400
+    query = filter_scores(select_json(Score), request.args)
+    if query is None:
+        response_object['message'] = 'Invalid filter parameters.'
+        return jsonify(response_object), 400
+
+    query = query.where(Score.id > after).order_by(Score.id)
+    if limit is not None:
+        limit = min(limit, current_app.config['SCORES_PAGE_MAX_LIMIT'])
+        query = query.limit(limit)
+    scores = fetch_json(query)
     response_object = {
         'status': 'success',
         'data': {
-            'scores': [ex.to_json() for ex in Score.query.all()]
+            'scores': scores
         }
     }
+    if limit is not None:
+        full_page = len(scores) == limit
+        response_object['data']['next'] = \
+            scores[-1]['id'] if full_page else None
     return jsonify(response_object), 200
 
 
+@scores_blueprint.route('/scores/export', methods=['GET'])
+def export_scores():
+    """Stream all scores as NDJSON or CSV.
+
+    Takes the same filters as GET /scores. Rows are read from a
+    server-side cursor, so memory use does not grow with the table.
+    """
+    response_object = {
+        'status': 'fail',
+        'message': 'Invalid filter parameters.'
+    }
+    query = filter_scores(select_json(Score), request.args)
+    if query is None:
+        return jsonify(response_object), 400
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        response_object['message'] = 'Invalid export format.'
+        return jsonify(response_object), 400
+    stream, mimetype = EXPORT_FORMATS[export_format]
+    rows = stream(query.order_by(Score.id),
+                  current_app.config['SCORES_STREAM_BATCH_SIZE'])
+    return Response(
+        stream_with_context(rows),
+        mimetype=mimetype,
+        # let a proxy pass rows through as they are produced
+        headers={'X-Accel-Buffering': 'no'}
+    )
+
+
+EXPORT_FORMATS = {
+    'ndjson': (stream_json, 'application/x-ndjson'),
+    'csv': (stream_csv, 'text/csv'),
+}
+
+
+def filter_scores(query, args):
+    """Apply the user_id, exercise_id and correct filters in args.
+
+    Returns None when a filter value is invalid.
+    """
+    try:
+        for name in ('user_id', 'exercise_id'):
+            if name in args:
+                column = Score.__table__.c[name]
+                query = query.where(column == int(args[name]))
+    except ValueError:
+        return None
+    if 'correct' in args:
+        correct = args['correct'].lower()
+        if correct not in ('true', 'false'):
+            return None
+        query = query.where(Score.correct == (correct == 'true'))
+    return query
+
+
 @scores_blueprint.route('/scores/user', methods=['GET'])
 @authenticate
 def get_all_scores_by_user_user(resp):
     """Get all scores by user id"""
-    scores = Score.query.filter_by(user_id=int(resp['data']['id'])).all()
+    scores = fetch_json(
+        select_json(Score)
+        .where(Score.user_id == int(resp['data']['id']))
+        .order_by(Score.id)
+    )
+    response_object = {
+        'status': 'success',
+        'data': {
+            'scores': scores
+        }
+    }
+    return jsonify(response_object), 200
+
+
+@scores_blueprint.route('/scores/summary/user', methods=['GET'])
+@authenticate
+def get_user_summary(resp):
+    """Get the number of attempted and correct exercises of the user"""
+    user_id = int(resp['data']['id'])
+    summary = fetch_json(
+        select_json(UserSummary).where(UserSummary.user_id == user_id))
+    response_object = {
+        'status': 'success',
+        'data': summary[0] if summary else {
+            'user_id': user_id,
+            'attempted': 0,
+            'correct': 0
+        }
+    }
+    return jsonify(response_object), 200
+
+
+@scores_blueprint.route('/scores/summary/exercise/<exercise_id>',
+                        methods=['GET'])
+def get_exercise_summary(exercise_id):
+    """Get the number of attempts and correct answers for an exercise"""
+    try:
+        exercise_id = int(exercise_id)
+    except ValueError:
+        response_object = {
+            'status': 'fail',
+            'message': 'Exercise does not exist'
+        }
+        return jsonify(response_object), 404
+    summary = fetch_json(
+        select_json(ExerciseSummary)
+        .where(ExerciseSummary.exercise_id == exercise_id))
+    data = summary[0] if summary else {
+        'exercise_id': exercise_id,
+        'attempted': 0,
+        'correct': 0
+    }
+    data['pass_rate'] = \
+        data['correct'] / data['attempted'] if data['attempted'] else 0.0
+    response_object = {
+        'status': 'success',
+        'data': data
+    }
+    return jsonify(response_object), 200
+
+
+@scores_blueprint.route('/scores/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Get the users with the most correct exercises"""
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= current_app.config['SCORES_LEADERBOARD_MAX_LIMIT']:
+        response_object = {
+            'status': 'fail',
+            'message': 'Invalid limit.'
+        }
+        return jsonify(response_object), 400
+    # a top-N scan of the summaries index, not a GROUP BY over scores
+    leaders = fetch_json(
+        select_json(UserSummary)
+        .order_by(UserSummary.correct.desc(), UserSummary.user_id)
+        .limit(limit)
+    )
+    for position, leader in enumerate(leaders):
+        previous = leaders[position - 1] if position else None
+        if previous and previous['correct'] == leader['correct']:
+            leader['rank'] = previous['rank']
+        else:
+            leader['rank'] = position + 1
+    response_object = {
+        'status': 'success',
+        'data': {
+            'leaderboard': leaders
+        }
+    }
+    return jsonify(response_object), 200
+
+
+@scores_blueprint.route('/scores/analytics', methods=['GET'])
+@authenticate
+def get_analytics(resp):
+    """Get pass rates per exercise and score distributions over users"""
+    if not is_admin(resp):
+        response_object = {
+            'status': 'error',
+            'message': 'You do not have permission to do that.'
+        }
+        return jsonify(response_object), 401
+    snapshot.refresh()
+    response_object = {
+        'status': 'success',
+        'data': snapshot.report()
+    }
+    return jsonify(response_object), 200
+
+
+@scores_blueprint.route('/scores/user/attempts', methods=['GET'])
+@authenticate
+def get_attempts_by_user(resp):
+    """Get the user's attempts, optionally for one exercise.
+
+    `limit` and `after` page through the attempts by id.
+    """
+    response_object = {
+        'status': 'fail',
+        'message': 'Invalid pagination parameters.'
+    }
+    try:
+        limit = min(int(request.args.get('limit', 100)),
+                    current_app.config['SCORES_PAGE_MAX_LIMIT'])
+        after = int(request.args.get('after', 0))
+        exercise_id = request.args.get('exercise_id')
+        if exercise_id is not None:
+            exercise_id = int(exercise_id)
+    except ValueError:
+        return jsonify(response_object), 400
+    if limit < 1 or after < 0:
+        return jsonify(response_object), 400
+    query = select_json(Attempt).where(
+        Attempt.user_id == int(resp['data']['id']))
+    if exercise_id is not None:
+        query = query.where(Attempt.exercise_id == exercise_id)
+    attempts = fetch_json(
+        query.where(Attempt.id > after).order_by(Attempt.id).limit(limit))
     response_object = {
         'status': 'success',
         'data': {
-            'scores': [ex.to_json() for ex in scores]
+            'attempts': attempts,
+            'next': attempts[-1]['id'] if len(attempts) == limit else None
         }
     }
     return jsonify(response_object), 200
 
 
+@scores_blueprint.route('/scores/user/progress', methods=['GET'])
+@authenticate
+def get_progress_by_user(resp):
+    """Get the exercises the user has attempted and solved as bitsets.
+
+    Each bitset is base64 encoded, most significant bit first: bit n of
+    the decoded bytes is set when exercise n was attempted, or solved.
+    The response carries an ETag, so clients can revalidate cheaply.
+    """
+    user_id = int(resp['data']['id'])
+    row = db.session.execute(
+        select([UserSummary.attempted_bits, UserSummary.correct_bits])
+        .where(UserSummary.user_id == user_id)
+    ).first()
+    attempted, correct = row if row else ('', '')
+    size = max(len(attempted), len(correct))
+    response_object = {
+        'status': 'success',
+        'data': {
+            'user_id': user_id,
+            'size': size,
+            'attempted': encode_bits(attempted, size),
+            'correct': encode_bits(correct, size)
+        }
+    }
+    response = jsonify(response_object)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def encode_bits(bits, size):
+    """Base64 of a '0'/'1' string, padded with zeros to size bits."""
+    size += -size % 8
+    value = int(bits, 2) << (size - len(bits)) if bits else 0
+    return base64.b64encode(value.to_bytes(size // 8, 'big')).decode()
+
+
 @scores_blueprint.route('/scores/user/<score_id>', methods=['GET'])
 @authenticate
 def get_single_score_by_user_id(resp, score_id):
@@ -82,6 +357,8 @@ def add_scores(resp):
     if not post_data:
         return jsonify(response_object), 400
     exercise_id = post_data.get('exercise_id')
+    if not valid_exercise_id(exercise_id):
+        return jsonify(response_object), 400
     correct = False
     if post_data.get('correct'):
         correct = post_data.get('correct')
@@ -90,6 +367,9 @@ def add_scores(resp):
             user_id=resp['data']['id'],
             exercise_id=exercise_id,
             correct=correct))
+        db.session.flush()
+        Attempt.log(resp['data']['id'], [(exercise_id, correct)])
+        record_scores(resp['data']['id'], [(exercise_id, True, correct)])
         db.session.commit()
         response_object['status'] = 'success'
         response_object['message'] = 'New score was added!'
@@ -102,6 +382,57 @@ def add_scores(resp):
         return jsonify(response_object), 400
 
 
+@scores_blueprint.route('/scores/batch', methods=['PUT'])
+@authenticate
+def update_scores(resp):
+    """Update many scores in one transaction"""
+    post_data = request.get_json()
+    response_object = {
+        'status': 'fail',
+        'message': 'Invalid payload.'
+    }
+    if not post_data or not isinstance(post_data, list) or \
+       len(post_data) > current_app.config['SCORES_BATCH_MAX_SIZE']:
+        return jsonify(response_object), 400
+    errors = [index for index, item in enumerate(post_data)
+              if not valid_score_item(item)]
+    if errors:
+        response_object['data'] = {'invalid': errors}
+        return jsonify(response_object), 400
+    attempts = [(item['exercise_id'], item['correct']) for item in post_data]
+    # the last submission for an exercise wins, as with separate requests
+    scores = dict(attempts)
+    try:
+        created = save_scores(int(resp['data']['id']), attempts)
+        db.session.commit()
+    except (exc.IntegrityError, exc.DataError):
+        db.session().rollback()
+        return jsonify(response_object), 400
+    response_object['status'] = 'success'
+    response_object['message'] = 'Scores were saved!'
+    response_object['data'] = {
+        'scores': [{
+            'exercise_id': item['exercise_id'],
+            'correct': scores[item['exercise_id']],
+            'created': created.get(item['exercise_id'], False),
+        } for item in post_data]
+    }
+    return jsonify(response_object), 200
+
+
+def valid_score_item(item):
+    return isinstance(item, dict) and \
+        valid_exercise_id(item.get('exercise_id')) and \
+        isinstance(item.get('correct'), bool)
+
+
+def valid_exercise_id(exercise_id):
+    """Exercise ids index the progress bitsets, so they must be bounded."""
+    return isinstance(exercise_id, int) and \
+        not isinstance(exercise_id, bool) and \
+        0 < exercise_id <= current_app.config['SCORES_MAX_EXERCISE_ID']
+
+
 @scores_blueprint.route('/scores/<exercise_id>', methods=['PUT'])
 @authenticate
 def update_score(resp, exercise_id):
@@ -115,25 +446,19 @@ def update_score(resp, exercise_id):
         return jsonify(response_object), 400
     correct = post_data.get('correct')
     try:
-        score = Score.query.filter_by(
-            exercise_id=int(exercise_id),
-            user_id=int(resp['data']['id'])
-        ).first()
-        if score:
-            score.correct = correct
-            db.session.commit()
-            response_object['status'] = 'success'
-            response_object['message'] = 'Score was updated!'
-            return jsonify(response_object), 200
-        else:
-            db.session.add(Score(
-                user_id=resp['data']['id'],
-                exercise_id=int(exercise_id),
-                correct=correct))
-            db.session.commit()
-            response_object['status'] = 'success'
-            response_object['message'] = 'New score was added!'
-            return jsonify(response_object), 201
-    except (exc.IntegrityError, ValueError, TypeError):
+        exercise_id = int(exercise_id)
+        if not valid_exercise_id(exercise_id):
+            raise ValueError
+        created = save_scores(
+            int(resp['data']['id']), [(exercise_id, correct)]
+        ).get(exercise_id, False)
+        db.session.commit()
+    except (exc.IntegrityError, exc.DataError, ValueError, TypeError):
         db.session().rollback()
         return jsonify(response_object), 400
+    response_object['status'] = 'success'
+    if created:
+        response_object['message'] = 'New score was added!'
+        return jsonify(response_object), 201
+    response_object['message'] = 'Score was updated!'
+    return jsonify(response_object), 200
@@ -1,11 +1,19 @@
 # project/api/utils.py
 
 
+import csv
+import io
 import json
 from functools import wraps
 
 import requests
 from flask import request, jsonify, current_app
+from sqlalchemy import select
+
+from project import db
+from project.api.introspection import token_cache
+from project.api.keys import verify_token
+from project.api.upstream import upstream
 
 
 def authenticate(f):
@@ -22,7 +30,11 @@ def authenticate(f):
             code = 403
             return jsonify(response_object), code
         auth_token = auth_header.split(" ")[1]
-        response = ensure_authenticated(auth_token)
+        try:
+            response = ensure_authenticated(auth_token)
+        except requests.RequestException:
+            response_object['message'] = 'Users service is unavailable.'
+            return jsonify(response_object), 503
         if not response:
             response_object['message'] = 'Invalid token.'
             return jsonify(response_object), code
@@ -38,10 +50,30 @@ def ensure_authenticated(token):
             'admin': True
         }
         return test_response
+    if current_app.config['AUTH_LOCAL_VERIFY']:
+        response = verify_token(token)
+        if response is not None:
+            return response
+    return token_cache.get_or_load(token, introspect_token)
+
+
+def is_admin(resp):
+    """Whether the user authenticate handed to a view is an admin.
+
+    Locally verified tokens carry the flag at the top level as well, but
+    a response from /auth/status only has it in data.
+    """
+    return bool(resp.get('admin', resp['data'].get('admin')))
+
+
+def introspect_token(token):
     url = '{0}/auth/status'.format(current_app.config['USERS_SERVICE_URL'])
     bearer = 'Bearer {0}'.format(token)
     headers = {'Authorization': bearer}
-    response = requests.get(url, headers=headers)
+    response = upstream.get(url, headers=headers)
+    if response.status_code >= 500:
+        # an outage is not a verdict on the token, so do not cache it
+        response.raise_for_status()
     data = json.loads(response.text)
     if response.status_code == 200 and \
        data['status'] == 'success' and \
@@ -49,3 +81,45 @@ def ensure_authenticated(token):
         return data
     else:
         return False
+
+
+def select_json(model):
+    """Core select of the columns serialized by model.to_json."""
+    return select([model.__table__.c[name] for name in model.json_columns])
+
+
+def fetch_json(statement):
+    """Run a Core select and return its rows as dicts, bypassing the ORM."""
+    result = db.session.execute(statement)
+    keys = result.keys()
+    return [dict(zip(keys, row)) for row in result]
+
+
+def stream_json(statement, batch_size):
+    """Run a Core select on a server-side cursor, yielding NDJSON lines."""
+    result = db.session.execute(
+        statement.execution_options(stream_results=True))
+    keys = result.keys()
+    rows = result.fetchmany(batch_size)
+    while rows:
+        for row in rows:
+            yield json.dumps(dict(zip(keys, row))) + '\n'
+        rows = result.fetchmany(batch_size)
+
+
+def stream_csv(statement, batch_size):
+    """Run a Core select on a server-side cursor, yielding CSV chunks."""
+    result = db.session.execute(
+        statement.execution_options(stream_results=True))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(result.keys())
+    rows = result.fetchmany(batch_size)
+    while rows:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        rows = result.fetchmany(batch_size)
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -13,6 +13,27 @@ class BaseConfig:
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     USERS_SERVICE_URL = os.environ.get('USERS_SERVICE_URL')
+    AUTH_LOCAL_VERIFY = True
+    AUTH_KEYS_TTL = 3600
+    AUTH_KEYS_MIN_REFRESH = 30
+    UPSTREAM_CONNECT_TIMEOUT = 1
+    UPSTREAM_READ_TIMEOUT = 3
+    UPSTREAM_RETRIES = 2
+    UPSTREAM_BACKOFF = 0.1
+    UPSTREAM_POOL_SIZE = 10
+    AUTH_CACHE_SIZE = 10000
+    AUTH_CACHE_TTL = 60
+    AUTH_CACHE_NEGATIVE_TTL = 5
+    SCORES_BATCH_MAX_SIZE = 500
+    SCORES_LEADERBOARD_MAX_LIMIT = 100
+    SCORES_PAGE_MAX_LIMIT = 1000
+    SCORES_STREAM_BATCH_SIZE = 1000
+    # the progress bitsets hold one bit per exercise id up to this
+    SCORES_MAX_EXERCISE_ID = 100000
+    ANALYTICS_REVISION_OVERLAP = 10000
+    ANALYTICS_SNAPSHOT_MAX_AGE = 3600
+    ANALYTICS_BATCH_SIZE = 100000
+    ATTEMPTS_PARTITIONS_AHEAD = 3
 
 
 class DevelopmentConfig(BaseConfig):
@@ -0,0 +1,80 @@
+# services/scores/project/seed.py
+
+
+import io
+from itertools import islice
+
+from sqlalchemy import func
+
+from project import db
+from project.api.models import Score
+from project.api.upstream import upstream
+
+
+def fetch_exercise_ids(base_url):
+    response = upstream.get('{0}/exercises'.format(base_url))
+    response.raise_for_status()
+    return [exercise['id']
+            for exercise in response.json()['data']['exercises']]
+
+
+def fetch_user_pages(base_url, page_size, after=0):
+    """Yield lists of user ids, one page of GET /users at a time."""
+    url = '{0}/users'.format(base_url)
+    while after is not None:
+        response = upstream.get(url, params={
+            'limit': page_size,
+            'after': after
+        })
+        response.raise_for_status()
+        data = response.json()['data']
+        user_ids = [user['id'] for user in data['users']]
+        if user_ids:
+            yield user_ids
+        after = data['next']
+
+
+def last_seeded_user():
+    """The highest user id with a score, where a resumed seed picks up."""
+    return db.session.query(func.max(Score.user_id)).scalar() or 0
+
+
+def seed_scores(user_pages, exercise_ids, chunk_size=10000, progress=None):
+    """Create a score for every user and exercise pair.
+
+    Each page of users is written in its own transaction: the pairs are
+    streamed into a temporary table with COPY, chunk_size rows at a time,
+    then moved into scores skipping pairs that already exist. An
+    interrupted seed can therefore be re-run or resumed after the last
+    committed page. progress, if given, is called after each page with
+    the number of users, the number of scores created and the last user
+    id so far. Returns the number of scores created.
+    """
+    users = created = 0
+    for user_ids in user_pages:
+        cursor = db.session.connection().connection.cursor()
+        cursor.execute(
+            'CREATE TEMP TABLE IF NOT EXISTS scores_seed '
+            '(user_id integer, exercise_id integer) '
+            'ON COMMIT DELETE ROWS'
+        )
+        pairs = ((user_id, exercise_id)
+                 for user_id in user_ids for exercise_id in exercise_ids)
+        chunk = list(islice(pairs, chunk_size))
+        while chunk:
+            buffer = io.StringIO(''.join(
+                '{0}\t{1}\n'.format(*pair) for pair in chunk))
+            cursor.copy_expert(
+                'COPY scores_seed (user_id, exercise_id) FROM STDIN', buffer)
+            chunk = list(islice(pairs, chunk_size))
+        cursor.execute(
+            'INSERT INTO scores (user_id, exercise_id, correct) '
+            'SELECT user_id, exercise_id, false FROM scores_seed '
+            'ON CONFLICT (user_id, exercise_id) DO NOTHING'
+        )
+        created += cursor.rowcount
+        users += len(user_ids)
+        db.session.commit()
+        if progress is not None:
+            progress(users, created, user_ids[-1])
+    return created
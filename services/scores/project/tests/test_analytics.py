@@ -0,0 +1,174 @@
+# project/tests/test_analytics.py
+
+
+import json
+import unittest
+from unittest import mock
+
+import numpy as np
+from flask import current_app
+
+from project import db
+from project.api.analytics import ScoreSnapshot, count_by, snapshot
+from project.api.models import Score
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_score
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestScoreSnapshot(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        current_app.config['ANALYTICS_REVISION_OVERLAP'] = 0
+        self.timer = FakeTimer()
+        self.snapshot = ScoreSnapshot(timer=self.timer)
+
+    def tearDown(self):
+        current_app.config.from_object('project.config.TestingConfig')
+        super().tearDown()
+
+    def test_refresh_incremental(self):
+        add_score(1, 1, True)
+        add_score(1, 2, False)
+        self.assertEqual(self.snapshot.refresh(), 2)
+        self.assertEqual(self.snapshot.refresh(), 0)
+
+        Score.upsert(1, 2, True)
+        add_score(2, 1, False)
+        db.session.commit()
+        self.assertEqual(self.snapshot.refresh(), 2)
+        self.assertEqual(self.snapshot.correct.tolist(), [True, True, False])
+        self.assertEqual(self.snapshot.user_ids.tolist(), [1, 1, 2])
+
+    def test_refresh_out_of_order(self):
+        first = add_score(1, 1, False)
+        add_score(1, 2, False)
+        self.snapshot.refresh()
+        # a row whose revision was drawn earlier but committed later
+        db.session.execute(
+            'UPDATE scores SET correct = true, revision = 1 WHERE id = :id',
+            {'id': first.id})
+        db.session.commit()
+        self.snapshot.refresh()
+        self.assertFalse(self.snapshot.correct[0])
+        current_app.config['ANALYTICS_REVISION_OVERLAP'] = 10
+        self.snapshot.refresh()
+        self.assertTrue(self.snapshot.correct[0])
+
+    def test_reload_when_old(self):
+        add_score(1, 1, True)
+        self.snapshot.refresh()
+        self.timer.now += 3601
+        self.assertEqual(self.snapshot.refresh(), 1)
+        self.assertEqual(len(self.snapshot.ids), 1)
+
+    def test_report(self):
+        add_score(1, 1, True)
+        add_score(1, 2, True)
+        add_score(2, 1, False)
+        add_score(2, 2, True)
+        add_score(3, 1, False)
+        self.snapshot.refresh()
+        report = self.snapshot.report()
+        self.assertEqual(report['exercises'], [
+            {'exercise_id': 1, 'attempted': 3, 'correct': 1,
+             'pass_rate': 1 / 3},
+            {'exercise_id': 2, 'attempted': 2, 'correct': 2,
+             'pass_rate': 1.0},
+        ])
+        users = report['users']
+        self.assertEqual(users['count'], 3)
+        self.assertEqual(users['correct_histogram'], [1, 1, 1])
+        self.assertEqual(users['correct']['percentiles']['50'], 1.0)
+        self.assertAlmostEqual(users['attempted']['mean'], 5 / 3)
+        self.assertEqual(report['snapshot']['rows'], 5)
+
+    def test_report_sparse_ids(self):
+        add_score(-5, 2 ** 31 - 1, True)
+        add_score(2 ** 31 - 1, 2 ** 31 - 1, False)
+        add_score(1, -1, True)
+        self.snapshot.refresh()
+        report = self.snapshot.report()
+        self.assertEqual(report['exercises'], [
+            {'exercise_id': -1, 'attempted': 1, 'correct': 1,
+             'pass_rate': 1.0},
+            {'exercise_id': 2 ** 31 - 1, 'attempted': 2, 'correct': 1,
+             'pass_rate': 0.5},
+        ])
+        self.assertEqual(report['users']['count'], 3)
+        self.assertEqual(report['users']['correct_histogram'], [1, 2])
+
+    def test_report_empty(self):
+        self.snapshot.refresh()
+        report = self.snapshot.report()
+        self.assertEqual(report['exercises'], [])
+        self.assertEqual(report['users']['count'], 0)
+        self.assertEqual(report['users']['correct']['percentiles'], {})
+
+
+class TestCountBy(unittest.TestCase):
+    def check(self, keys, weights):
+        groups, counts, sums = count_by(
+            np.array(keys, dtype=np.int32), np.array(weights))
+        return groups.tolist(), counts.tolist(), sums.tolist()
+
+    def test_dense(self):
+        self.assertEqual(self.check([3, 1, 3], [True, False, True]),
+                         ([1, 3], [1, 2], [0.0, 2.0]))
+
+    def test_sparse(self):
+        self.assertEqual(
+            self.check([2 ** 31 - 1, -7, 2 ** 31 - 1], [True, True, False]),
+            ([-7, 2 ** 31 - 1], [1, 2], [1.0, 1.0]))
+
+    def test_empty(self):
+        self.assertEqual(self.check([], []), ([], [], []))
+
+
+class TestAnalyticsApi(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        snapshot.clear()
+
+    def test_analytics(self):
+        add_score(1, 1, True)
+        add_score(2, 1, False)
+        response = self.client.get(
+            '/scores/analytics',
+            headers=({'Authorization': 'Bearer test'})
+        )
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('success', data['status'])
+        self.assertEqual(data['data']['exercises'][0]['pass_rate'], 0.5)
+        self.assertEqual(data['data']['users']['count'], 2)
+
+    def test_analytics_status_fallback(self):
+        status = {
+            'status': 'success',
+            'message': 'success',
+            'data': {'id': 1, 'username': 'test', 'email': 'test@test.com',
+                     'active': True, 'admin': False}
+        }
+        with mock.patch('project.api.utils.ensure_authenticated',
+                        return_value=status):
+            response = self.client.get(
+                '/scores/analytics',
+                headers=({'Authorization': 'Bearer test'})
+            )
+        self.assertEqual(response.status_code, 401)
+
+    def test_analytics_no_header(self):
+        response = self.client.get('/scores/analytics')
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
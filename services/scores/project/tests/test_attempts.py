@@ -0,0 +1,207 @@
+# project/tests/test_attempts.py
+
+
+import datetime
+import json
+import threading
+import unittest
+
+from project import db
+from project.api import models
+from project.api.models import (
+    Attempt, Score, create_attempt_partitions, ensure_attempt_partitions
+)
+from project.tests.base import BaseTestCase
+
+
+def partitions():
+    return sorted(row[0] for row in db.session.execute(
+        "SELECT inhrelid::regclass::text FROM pg_inherits "
+        "WHERE inhparent = 'attempts'::regclass"))
+
+
+def count(table):
+    return db.session.execute(f'SELECT count(*) FROM {table}').scalar()
+
+
+class TestAttempts(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        models.partitions_checked = None
+
+    def tearDown(self):
+        models.partitions_checked = None
+        super().tearDown()
+
+    def put_score(self, exercise_id, correct):
+        return self.client.put(
+            f'/scores/{exercise_id}',
+            data=json.dumps({'correct': correct}),
+            content_type='application/json',
+            headers=({'Authorization': 'Bearer test'})
+        )
+
+    def test_partitions(self):
+        today = datetime.date.today()
+        self.assertIn('attempts_default', partitions())
+        self.assertIn('attempts_{0:%Y_%m}'.format(today), partitions())
+        self.assertEqual(len(partitions()), 4)
+
+        create_attempt_partitions(
+            db.session.connection(), 2, datetime.date(2030, 12, 15))
+        create_attempt_partitions(
+            db.session.connection(), 2, datetime.date(2030, 12, 15))
+        self.assertIn('attempts_2030_12', partitions())
+        self.assertIn('attempts_2031_01', partitions())
+        self.assertEqual(len(partitions()), 6)
+
+    def test_attempt_outside_partitions(self):
+        db.session.execute(Attempt.__table__.insert().values(
+            user_id=1, exercise_id=1, correct=True,
+            created_date=datetime.datetime(2001, 1, 1)))
+        db.session.commit()
+        count = db.session.execute(
+            'SELECT count(*) FROM attempts_default').scalar()
+        self.assertEqual(count, 1)
+
+    def test_partition_with_stranded_rows(self):
+        for day in (5, 20):
+            db.session.execute(Attempt.__table__.insert().values(
+                user_id=1, exercise_id=1, correct=True,
+                created_date=datetime.datetime(2030, 12, day)))
+        db.session.execute(Attempt.__table__.insert().values(
+            user_id=1, exercise_id=1, correct=True,
+            created_date=datetime.datetime(2031, 3, 1)))
+        db.session.commit()
+        self.assertEqual(count('attempts_default'), 3)
+
+        create_attempt_partitions(
+            db.session.connection(), 2, datetime.date(2030, 12, 1))
+        db.session.commit()
+        self.assertEqual(count('attempts_2030_12'), 2)
+        self.assertEqual(count('attempts_2031_01'), 0)
+        self.assertEqual(count('attempts_default'), 1)
+        self.assertEqual(Attempt.query.count(), 3)
+        self.assertIn('attempts_default', partitions())
+
+    def test_ensure_partitions(self):
+        ensure_attempt_partitions(datetime.date(2031, 5, 17))
+        self.assertIn('attempts_2031_05', partitions())
+        self.assertIn('attempts_2031_07', partitions())
+        self.assertNotIn('attempts_2031_08', partitions())
+        self.assertEqual(models.partitions_checked, datetime.date(2031, 5, 1))
+
+    def test_concurrent_ensure_partitions(self):
+        app = self.app
+        barrier = threading.Barrier(4)
+        errors = []
+
+        def ensure(year):
+            with app.app_context():
+                try:
+                    barrier.wait(5)
+                    models.partitions_checked = None
+                    ensure_attempt_partitions(datetime.date(year, 5, 17))
+                except Exception as error:
+                    errors.append(error)
+                    barrier.abort()
+
+        for year in range(2031, 2036):
+            threads = [threading.Thread(target=ensure, args=(year,))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertIn('attempts_2035_07', partitions())
+
+    def test_write_ensures_partitions(self):
+        db.session.execute('DROP TABLE attempts_{0:%Y_%m}'.format(
+            datetime.date.today()))
+        db.session.commit()
+        self.put_score(1, True)
+        self.assertIn(
+            'attempts_{0:%Y_%m}'.format(datetime.date.today()), partitions())
+        self.assertEqual(count('attempts_default'), 0)
+
+    def test_every_write_is_logged(self):
+        self.put_score(1, False)
+        self.put_score(1, True)
+        self.client.put(
+            '/scores/batch',
+            data=json.dumps([
+                {'exercise_id': 1, 'correct': False},
+                {'exercise_id': 1, 'correct': True},
+                {'exercise_id': 2, 'correct': True},
+            ]),
+            content_type='application/json',
+            headers=({'Authorization': 'Bearer test'})
+        )
+        self.client.post(
+            '/scores',
+            data=json.dumps({'exercise_id': 3, 'correct': True}),
+            content_type='application/json',
+            headers=({'Authorization': 'Bearer test'})
+        )
+        attempts = Attempt.query.order_by(Attempt.id).all()
+        self.assertEqual(
+            [(attempt.exercise_id, attempt.correct) for attempt in attempts],
+            [(1, False), (1, True), (1, False), (1, True), (2, True),
+             (3, True)])
+        self.assertTrue(all(attempt.created_date for attempt in attempts))
+        self.assertEqual(Score.query.count(), 3)
+        self.assertTrue(Score.query.filter_by(exercise_id=1).one().correct)
+
+    def test_failed_write_is_not_logged(self):
+        response = self.put_score(1, None)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Attempt.query.count(), 0)
+
+    def test_attempts_by_user(self):
+        for correct in (False, False, True):
+            self.put_score(1, correct)
+        self.put_score(2, True)
+        response = self.client.get(
+            '/scores/user/attempts?exercise_id=1&limit=2',
+            headers=({'Authorization': 'Bearer test'})
+        )
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('success', data['status'])
+        self.assertEqual(
+            [attempt['correct'] for attempt in data['data']['attempts']],
+            [False, False])
+        self.assertTrue(data['data']['next'])
+
+        response = self.client.get(
+            '/scores/user/attempts?exercise_id=1&limit=2&after={0}'.format(
+                data['data']['next']),
+            headers=({'Authorization': 'Bearer test'})
+        )
+        data = json.loads(response.data.decode())
+        self.assertEqual(
+            [attempt['correct'] for attempt in data['data']['attempts']],
+            [True])
+        self.assertIsNone(data['data']['next'])
+
+        response = self.client.get(
+            '/scores/user/attempts',
+            headers=({'Authorization': 'Bearer test'})
+        )
+        data = json.loads(response.data.decode())
+        self.assertEqual(len(data['data']['attempts']), 4)
+
+    def test_attempts_by_user_invalid(self):
+        for query in ('limit=0', 'after=blah', 'exercise_id=blah'):
+            response = self.client.get(
+                f'/scores/user/attempts?{query}',
+                headers=({'Authorization': 'Bearer test'})
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid pagination parameters.', data['message'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+# project/tests/test_progress.py
+
+
+import base64
+import json
+import unittest
+
+from flask import current_app
+
+from project import db
+from project.api.models import Score, UserSummary, rebuild_summaries
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_score
+
+
+def decode(encoded, size):
+    data = base64.b64decode(encoded)
+    return {n for n in range(size) if data[n // 8] & (0x80 >> n % 8)}
+
+
+class TestProgress(BaseTestCase):
+    def get_progress(self, headers=None):
+        response = self.client.get(
+            '/scores/user/progress',
+            headers=dict({'Authorization': 'Bearer test'}, **(headers or {}))
+        )
+        data = json.loads(response.data.decode()) if response.data else None
+        return response, data
+
+    def test_progress(self):
+        Score.upsert_many(998877, {1: True, 3: False, 10: True})
+        db.session.commit()
+        response, data = self.get_progress()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('success', data['status'])
+        self.assertEqual(data['data']['size'], 11)
+        self.assertEqual(decode(data['data']['attempted'], 11), {1, 3, 10})
+        self.assertEqual(decode(data['data']['correct'], 11), {1, 10})
+
+        Score.upsert_many(998877, {1: False, 3: True, 20: False})
+        db.session.commit()
+        response, data = self.get_progress()
+        self.assertEqual(data['data']['size'], 21)
+        self.assertEqual(decode(data['data']['attempted'], 21),
+                         {1, 3, 10, 20})
+        self.assertEqual(decode(data['data']['correct'], 21), {3, 10})
+
+    def test_progress_no_scores(self):
+        response, data = self.get_progress()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data']['size'], 0)
+        self.assertEqual(data['data']['attempted'], '')
+
+    def test_progress_not_modified(self):
+        Score.upsert(998877, 2, True)
+        db.session.commit()
+        response, _ = self.get_progress()
+        etag = response.headers['ETag']
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+
+        response, _ = self.get_progress({'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        Score.upsert(998877, 2, False)
+        db.session.commit()
+        response, _ = self.get_progress({'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_out_of_range_ids(self):
+        """Ensure ids outside the bitsets are rejected or left out."""
+        too_big = current_app.config['SCORES_MAX_EXERCISE_ID'] + 1
+        for exercise_id in (-1, 0, too_big, 2 ** 31 - 1):
+            response = self.client.put(
+                f'/scores/{exercise_id}',
+                data=json.dumps({'correct': True}),
+                content_type='application/json',
+                headers=({'Authorization': 'Bearer test'})
+            )
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post(
+                '/scores',
+                data=json.dumps({'exercise_id': exercise_id,
+                                 'correct': True}),
+                content_type='application/json',
+                headers=({'Authorization': 'Bearer test'})
+            )
+            self.assertEqual(response.status_code, 400)
+        response = self.client.put(
+            '/scores/batch',
+            data=json.dumps([
+                {'exercise_id': 2, 'correct': True},
+                {'exercise_id': -3, 'correct': True},
+                {'exercise_id': 2 ** 31 - 1, 'correct': True},
+            ]),
+            content_type='application/json',
+            headers=({'Authorization': 'Bearer test'})
+        )
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['data']['invalid'], [1, 2])
+        self.assertEqual(Score.query.count(), 0)
+        self.assertEqual(UserSummary.query.count(), 0)
+
+        # writes that bypass the API still count but get no bit
+        Score.upsert_many(1, {-3: True, 4: True, too_big: True})
+        db.session.commit()
+        summary = UserSummary.query.get(1)
+        self.assertEqual(summary.attempted, 3)
+        self.assertEqual(summary.attempted_bits, '00001')
+        rebuild_summaries()
+        db.session.commit()
+        self.assertEqual(UserSummary.query.get(1).attempted_bits, '00001')
+
+    def test_progress_no_header(self):
+        response = self.client.get('/scores/user/progress')
+        self.assertEqual(response.status_code, 403)
+
+    def test_rebuild_matches_writes(self):
+        Score.upsert_many(1, {0: True, 5: False, 9: True})
+        Score.upsert_many(1, {5: True, 9: False})
+        Score.upsert_many(2, {4: False})
+        db.session.commit()
+        expected = {user.user_id: (user.attempted_bits, user.correct_bits)
+                    for user in UserSummary.query.all()}
+        add_score(3, 2, True)
+        rebuild_summaries()
+        db.session.commit()
+        rebuilt = {user.user_id: (user.attempted_bits, user.correct_bits)
+                   for user in UserSummary.query.all()}
+        self.assertEqual(rebuilt.pop(3), ('001', '001'))
+        self.assertEqual(rebuilt, expected)
+        self.assertEqual(expected[1], ('1000010001', '1000010000'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,15 @@
 # services/scores/project/tests/test_scores_api.py
 
 
+import csv
+import io
 import json
 import unittest
 
+from flask import current_app
+
+from project import db
+from project.api.models import Score, UserSummary
 from project.tests.base import BaseTestCase
 from project.tests.utils import add_score
 
@@ -36,6 +42,107 @@ class TestScoresService(BaseTestCase):
             self.assertFalse(data['data']['scores'][1]['correct'])
             self.assertIn('success', data['status'])
 
+    def test_all_scores_paginated(self):
+        """Ensure get all scores pages through scores by id."""
+        for exercise_id in range(5):
+            add_score(1, exercise_id, True)
+        response = self.client.get('/scores?limit=2')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [score['exercise_id'] for score in data['data']['scores']],
+            [0, 1])
+        seen = [score['id'] for score in data['data']['scores']]
+        while data['data']['next']:
+            response = self.client.get(
+                f'/scores?limit=2&after={data["data"]["next"]}')
+            data = json.loads(response.data.decode())
+            seen += [score['id'] for score in data['data']['scores']]
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_all_scores_invalid_pagination(self):
+        """Ensure error is thrown if the page parameters are invalid."""
+        for query in ('limit=0', 'limit=blah', 'after=-1'):
+            response = self.client.get(f'/scores?{query}')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid pagination parameters.', data['message'])
+
+    def test_all_scores_filtered(self):
+        """Ensure get all scores filters by user, exercise and result."""
+        add_score(1, 1, True)
+        add_score(1, 2, False)
+        add_score(2, 1, False)
+        add_score(2, 2, True)
+        for query, expected in (
+                ('user_id=1', [(1, 1), (1, 2)]),
+                ('exercise_id=1', [(1, 1), (2, 1)]),
+                ('correct=false', [(1, 2), (2, 1)]),
+                ('user_id=2&correct=true', [(2, 2)])):
+            response = self.client.get(f'/scores?{query}')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                [(score['user_id'], score['exercise_id'])
+                 for score in data['data']['scores']], expected)
+
+    def test_all_scores_invalid_filter(self):
+        """Ensure error is thrown if a filter is invalid."""
+        for query in ('user_id=blah', 'exercise_id=', 'correct=yes'):
+            response = self.client.get(f'/scores?{query}')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid filter parameters.', data['message'])
+
+    def test_export_scores_ndjson(self):
+        """Ensure scores can be exported as NDJSON."""
+        add_score(1, 1, True)
+        add_score(2, 1, False)
+        add_score(2, 2, True)
+        response = self.client.get('/scores/export?user_id=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        scores = [json.loads(line)
+                  for line in response.data.decode().splitlines()]
+        self.assertEqual(
+            [(score['exercise_id'], score['correct']) for score in scores],
+            [(1, False), (2, True)])
+
+    def test_export_scores_csv(self):
+        """Ensure scores can be exported as CSV."""
+        current_app.config['SCORES_STREAM_BATCH_SIZE'] = 2
+        try:
+            for exercise_id in range(5):
+                add_score(1, exercise_id, exercise_id % 2 == 0)
+            response = self.client.get('/scores/export?format=csv')
+        finally:
+            current_app.config.from_object('project.config.TestingConfig')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        rows = list(csv.reader(io.StringIO(response.data.decode())))
+        self.assertEqual(rows[0], ['id', 'user_id', 'exercise_id', 'correct'])
+        self.assertEqual([row[2] for row in rows[1:]],
+                         ['0', '1', '2', '3', '4'])
+        self.assertEqual(rows[1][3], 'True')
+
+    def test_export_scores_csv_empty(self):
+        """Ensure an empty CSV export still has a header."""
+        response = self.client.get('/scores/export?format=csv')
+        self.assertEqual(response.data.decode().strip(),
+                         'id,user_id,exercise_id,correct')
+
+    def test_export_scores_invalid(self):
+        """Ensure error is thrown for unknown formats and bad filters."""
+        response = self.client.get('/scores/export?format=xml')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid export format.', data['message'])
+        response = self.client.get('/scores/export?correct=maybe')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid filter parameters.', data['message'])
+
     def test_all_scores_by_user_id(self):
         """Ensure get all scores by user id behaves correctly."""
         add_score(998877, 878778, True)
@@ -72,6 +179,113 @@ class TestScoresService(BaseTestCase):
         self.assertIn('Provide a valid auth token.', data['message'])
         self.assertIn('error', data['status'])
 
+    def test_user_summary(self):
+        """Ensure the user summary follows score writes."""
+        headers = {'Authorization': 'Bearer test'}
+        with self.client:
+            self.client.post(
+                '/scores',
+                data=json.dumps({'exercise_id': 1, 'correct': True}),
+                content_type='application/json',
+                headers=headers
+            )
+            self.client.put(
+                '/scores/batch',
+                data=json.dumps([
+                    {'exercise_id': 1, 'correct': False},
+                    {'exercise_id': 2, 'correct': True},
+                    {'exercise_id': 3, 'correct': False},
+                ]),
+                content_type='application/json',
+                headers=headers
+            )
+            response = self.client.get(
+                '/scores/summary/user', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('success', data['status'])
+            self.assertEqual(data['data'], {
+                'user_id': 998877,
+                'attempted': 3,
+                'correct': 1
+            })
+
+    def test_user_summary_no_scores(self):
+        """Ensure the user summary is empty without scores."""
+        response = self.client.get(
+            '/scores/summary/user',
+            headers=({'Authorization': 'Bearer test'})
+        )
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data']['attempted'], 0)
+        self.assertEqual(data['data']['correct'], 0)
+
+    def test_user_summary_no_header(self):
+        """Ensure error is thrown if 'Authorization' header is empty."""
+        response = self.client.get('/scores/summary/user')
+        self.assertEqual(response.status_code, 403)
+
+    def test_exercise_summary(self):
+        """Ensure the exercise summary reports the pass rate."""
+        with self.client:
+            self.client.put(
+                '/scores/5',
+                data=json.dumps({'correct': True}),
+                content_type='application/json',
+                headers=({'Authorization': 'Bearer test'})
+            )
+            response = self.client.get('/scores/summary/exercise/5')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(data['data'], {
+                'exercise_id': 5,
+                'attempted': 1,
+                'correct': 1,
+                'pass_rate': 1.0
+            })
+            self.assertEqual(UserSummary.query.get(998877).correct, 1)
+
+    def test_exercise_summary_no_scores(self):
+        """Ensure an exercise without attempts has a zero pass rate."""
+        response = self.client.get('/scores/summary/exercise/6')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data']['attempted'], 0)
+        self.assertEqual(data['data']['pass_rate'], 0.0)
+
+    def test_exercise_summary_incorrect_id(self):
+        """Ensure error is thrown if the id is not a number."""
+        response = self.client.get('/scores/summary/exercise/blah')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('Exercise does not exist', data['message'])
+
+    def test_leaderboard(self):
+        """Ensure the leaderboard ranks users by correct exercises."""
+        Score.upsert_many(1, {1: True, 2: False})
+        Score.upsert_many(2, {1: True, 2: True, 3: True})
+        Score.upsert_many(3, {1: True, 2: True, 3: False})
+        Score.upsert_many(4, {2: True, 3: True})
+        db.session.commit()
+        response = self.client.get('/scores/leaderboard?limit=3')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('success', data['status'])
+        self.assertEqual(data['data']['leaderboard'], [
+            {'user_id': 2, 'attempted': 3, 'correct': 3, 'rank': 1},
+            {'user_id': 3, 'attempted': 3, 'correct': 2, 'rank': 2},
+            {'user_id': 4, 'attempted': 2, 'correct': 2, 'rank': 2},
+        ])
+
+    def test_leaderboard_invalid_limit(self):
+        """Ensure error is thrown if the limit is out of range."""
+        for limit in ('0', '101', 'blah'):
+            response = self.client.get(f'/scores/leaderboard?limit={limit}')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid limit.', data['message'])
+
     def test_single_score_by_user_id(self):
         """Ensure get all scores by user id behaves correctly."""
         score = add_score(998877, 65479, True)
@@ -193,6 +407,24 @@ class TestScoresService(BaseTestCase):
             self.assertEqual(response.status_code, 200)
             self.assertIn('Score was updated!', data['message'])
             self.assertIn('success', data['status'])
+            scores = Score.query.filter_by(
+                user_id=998877, exercise_id=65479).all()
+            self.assertEqual(len(scores), 1)
+            self.assertFalse(scores[0].correct)
+
+    def test_update_score_missing_correct(self):
+        """Ensure error is thrown if 'correct' is missing."""
+        with self.client:
+            response = self.client.put(
+                '/scores/7',
+                data=json.dumps({'answer': True}),
+                content_type='application/json',
+                headers=({'Authorization': 'Bearer test'})
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid payload.', data['message'])
+            self.assertIn('fail', data['status'])
 
     def test_update_score_invalid_json(self):
         """Ensure error is thrown if the JSON object is empty."""
@@ -223,6 +455,99 @@ class TestScoresService(BaseTestCase):
             self.assertIn('New score was added!', data['message'])
             self.assertIn('success', data['status'])
 
+    def test_update_scores_batch(self):
+        """Ensure many scores can be saved in one request."""
+        add_score(998877, 1, False)
+        with self.client:
+            response = self.client.put(
+                '/scores/batch',
+                data=json.dumps([
+                    {'exercise_id': 1, 'correct': True},
+                    {'exercise_id': 2, 'correct': False},
+                ]),
+                content_type='application/json',
+                headers=({'Authorization': 'Bearer test'})
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Scores were saved!', data['message'])
+            self.assertIn('success', data['status'])
+            self.assertEqual(data['data']['scores'], [
+                {'exercise_id': 1, 'correct': True, 'created': False},
+                {'exercise_id': 2, 'correct': False, 'created': True},
+            ])
+            scores = Score.query.filter_by(user_id=998877) \
+                .order_by(Score.exercise_id).all()
+            self.assertEqual([(s.exercise_id, s.correct) for s in scores],
+                             [(1, True), (2, False)])
+
+    def test_update_scores_batch_repeated_exercise(self):
+        """Ensure the last submission for an exercise wins."""
+        with self.client:
+            response = self.client.put(
+                '/scores/batch',
+                data=json.dumps([
+                    {'exercise_id': 3, 'correct': False},
+                    {'exercise_id': 3, 'correct': True},
+                ]),
+                content_type='application/json',
+                headers=({'Authorization': 'Bearer test'})
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(data['data']['scores']), 2)
+            self.assertTrue(data['data']['scores'][0]['correct'])
+            score = Score.query.filter_by(user_id=998877).one()
+            self.assertTrue(score.correct)
+
+    def test_update_scores_batch_invalid_items(self):
+        """Ensure nothing is saved if any item is invalid."""
+        with self.client:
+            response = self.client.put(
+                '/scores/batch',
+                data=json.dumps([
+                    {'exercise_id': 1, 'correct': True},
+                    {'exercise_id': '2', 'correct': True},
+                    {'exercise_id': 3},
+                ]),
+                content_type='application/json',
+                headers=({'Authorization': 'Bearer test'})
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid payload.', data['message'])
+            self.assertEqual(data['data']['invalid'], [1, 2])
+            self.assertEqual(Score.query.count(), 0)
+
+    def test_update_scores_batch_invalid_json(self):
+        """Ensure error is thrown if the payload is not a list."""
+        for payload in ({'exercise_id': 1, 'correct': True}, []):
+            response = self.client.put(
+                '/scores/batch',
+                data=json.dumps(payload),
+                content_type='application/json',
+                headers=({'Authorization': 'Bearer test'})
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid payload.', data['message'])
+
+    def test_update_scores_batch_too_large(self):
+        """Ensure error is thrown if the batch is too large."""
+        current_app.config['SCORES_BATCH_MAX_SIZE'] = 2
+        try:
+            response = self.client.put(
+                '/scores/batch',
+                data=json.dumps([{'exercise_id': i, 'correct': True}
+                                 for i in range(3)]),
+                content_type='application/json',
+                headers=({'Authorization': 'Bearer test'})
+            )
+        finally:
+            current_app.config.from_object('project.config.TestingConfig')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Score.query.count(), 0)
+
     def test_update_score_no_header(self):
         """Ensure error is thrown if 'Authorization' header is empty."""
         response = self.client.put(
@@ -1,6 +1,14 @@
 # services/scores/project/tests/test_scores_model.py
 
 
+import threading
+
+from sqlalchemy.exc import IntegrityError
+
+from project import db
+from project.api.models import (
+    ExerciseSummary, Score, UserSummary, rebuild_summaries
+)
 from project.tests.base import BaseTestCase
 from project.tests.utils import add_score
 
@@ -12,3 +20,80 @@ class TestScoreModel(BaseTestCase):
         self.assertTrue(score.id)
         self.assertEqual(score.user_id, 1)
         self.assertEqual(score.exercise_id, 1)
+
+    def test_add_score_duplicate(self):
+        add_score(1, 1, True)
+        with self.assertRaises(IntegrityError):
+            add_score(1, 1, False)
+
+    def test_upsert(self):
+        self.assertTrue(Score.upsert(1, 1, False))
+        self.assertFalse(Score.upsert(1, 1, True))
+        db.session.commit()
+        scores = Score.query.filter_by(user_id=1, exercise_id=1).all()
+        self.assertEqual(len(scores), 1)
+        self.assertTrue(scores[0].correct)
+
+    def test_upsert_updates_summaries(self):
+        Score.upsert_many(1, {1: True, 2: False})
+        Score.upsert_many(2, {1: False})
+        Score.upsert_many(1, {1: True, 2: True})
+        Score.upsert(2, 1, True)
+        db.session.commit()
+        self.assertEqual(summary(UserSummary, 1), (2, 2))
+        self.assertEqual(summary(UserSummary, 2), (1, 1))
+        self.assertEqual(summary(ExerciseSummary, 1), (2, 2))
+        self.assertEqual(summary(ExerciseSummary, 2), (1, 1))
+        Score.upsert(1, 2, False)
+        db.session.commit()
+        self.assertEqual(summary(UserSummary, 1), (2, 1))
+        self.assertEqual(summary(ExerciseSummary, 2), (1, 0))
+
+    def test_upsert_many_concurrent_batches(self):
+        exercise_ids = list(range(1, 51))
+        Score.upsert_many(1, {n: False for n in exercise_ids})
+        db.session.commit()
+        app = self.app
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def batch(order):
+            with app.app_context():
+                try:
+                    for correct in (True, False) * 5:
+                        barrier.wait(5)
+                        Score.upsert_many(
+                            1, {n: correct for n in order})
+                        db.session.commit()
+                except Exception as error:
+                    errors.append(error)
+                    barrier.abort()
+                finally:
+                    db.session.remove()
+
+        threads = [threading.Thread(target=batch, args=(order,))
+                   for order in (exercise_ids, exercise_ids[::-1])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_rebuild_summaries(self):
+        add_score(1, 1, True)
+        add_score(1, 2, False)
+        add_score(2, 1, False)
+        db.session.add(UserSummary(user_id=3, attempted=5, correct=5))
+        db.session.commit()
+        rebuild_summaries()
+        db.session.commit()
+        self.assertEqual(summary(UserSummary, 1), (2, 1))
+        self.assertEqual(summary(UserSummary, 2), (1, 0))
+        self.assertIsNone(UserSummary.query.get(3))
+        self.assertEqual(summary(ExerciseSummary, 1), (2, 1))
+        self.assertEqual(summary(ExerciseSummary, 2), (1, 0))
+
+
+def summary(model, key):
+    row = model.query.get(key)
+    return row.attempted, row.correct
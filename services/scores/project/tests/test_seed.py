@@ -0,0 +1,86 @@
+# project/tests/test_seed.py
+
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from project.api.models import Score
+from project.seed import (
+    fetch_exercise_ids, fetch_user_pages, last_seeded_user, seed_scores
+)
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_score
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/exercises':
+            data = {'exercises': [{'id': 1}, {'id': 2}]}
+        else:
+            query = parse_qs(url.query)
+            limit = int(query['limit'][0])
+            after = int(query['after'][0])
+            users = [{'id': i} for i in range(after + 1, 6)][:limit]
+            data = {
+                'users': users,
+                'next': users[-1]['id'] if len(users) == limit else None
+            }
+        body = json.dumps({'status': 'success', 'data': data}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSeed(BaseTestCase):
+    def test_fetch_pages(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        url = 'http://127.0.0.1:{0}'.format(server.server_port)
+        try:
+            self.assertEqual(fetch_exercise_ids(url), [1, 2])
+            self.assertEqual(list(fetch_user_pages(url, 2)),
+                             [[1, 2], [3, 4], [5]])
+            self.assertEqual(list(fetch_user_pages(url, 5, after=3)),
+                             [[4, 5]])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_seed_scores(self):
+        pages = []
+        created = seed_scores(
+            iter([[1, 2], [3]]), [10, 20, 30], chunk_size=4,
+            progress=lambda *args: pages.append(args))
+        self.assertEqual(created, 9)
+        self.assertEqual(pages, [(2, 6, 2), (3, 9, 3)])
+        pairs = {(score.user_id, score.exercise_id)
+                 for score in Score.query.all()}
+        self.assertEqual(pairs, {(user_id, exercise_id)
+                                 for user_id in (1, 2, 3)
+                                 for exercise_id in (10, 20, 30)})
+        self.assertEqual(last_seeded_user(), 3)
+
+    def test_seed_scores_again(self):
+        add_score(1, 10, True)
+        created = seed_scores(iter([[1]]), [10, 20])
+        self.assertEqual(created, 1)
+        self.assertTrue(Score.query.filter_by(exercise_id=10).one().correct)
+        self.assertEqual(seed_scores(iter([[1]]), [10, 20]), 0)
+
+    def test_last_seeded_user_empty(self):
+        self.assertEqual(last_seeded_user(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
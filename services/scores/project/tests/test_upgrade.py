@@ -0,0 +1,61 @@
+# project/tests/test_upgrade.py
+
+
+import unittest
+
+from project import db
+from project.api.models import (
+    Attempt, ExerciseSummary, Score, UserSummary, upgrade_schema
+)
+from project.tests.base import BaseTestCase
+
+
+class TestUpgradeSchema(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # the tables as they were before revisions, summaries and attempts
+        db.session.remove()
+        db.drop_all()
+        db.session.execute(
+            'CREATE TABLE scores (id SERIAL PRIMARY KEY, '
+            'user_id INTEGER NOT NULL, exercise_id INTEGER NOT NULL, '
+            'correct BOOLEAN NOT NULL)')
+        db.session.execute(
+            'CREATE UNIQUE INDEX ix_scores_user_id_exercise_id '
+            'ON scores (user_id, exercise_id)')
+        db.session.execute(
+            'INSERT INTO scores (user_id, exercise_id, correct) '
+            'VALUES (1, 1, true), (1, 2, false), (2, 1, false)')
+        db.session.commit()
+
+    def test_upgrade(self):
+        upgrade_schema()
+        db.session.commit()
+        scores = Score.query.order_by(Score.id).all()
+        self.assertEqual(len(scores), 3)
+        self.assertEqual(len({score.revision for score in scores}), 3)
+        self.assertEqual(UserSummary.query.get(1).attempted, 2)
+        self.assertEqual(UserSummary.query.get(1).correct_bits, '010')
+        self.assertEqual(ExerciseSummary.query.get(1).attempted, 2)
+
+        self.assertFalse(Score.upsert(1, 2, True))
+        db.session.add(Attempt(user_id=1, exercise_id=2, correct=True))
+        db.session.commit()
+        self.assertGreater(Score.query.get(2).revision, scores[2].revision)
+        self.assertEqual(UserSummary.query.get(1).correct, 2)
+        self.assertEqual(Attempt.query.count(), 1)
+
+    def test_upgrade_summaries_without_bits(self):
+        db.session.execute(
+            'CREATE TABLE user_summaries (user_id INTEGER PRIMARY KEY, '
+            'attempted INTEGER NOT NULL, correct INTEGER NOT NULL)')
+        db.session.commit()
+        upgrade_schema()
+        db.session.commit()
+        upgrade_schema()
+        db.session.commit()
+        self.assertEqual(UserSummary.query.get(2).attempted_bits, '01')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# project/tests/test_upstream.py
+
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from flask import current_app
+
+from project.api.upstream import UpstreamClient
+from project.tests.base import BaseTestCase
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.hits += 1
+        if self.path == '/slow':
+            time.sleep(0.5)
+        status = 200
+        if self.path == '/flaky' and self.server.hits <= 2:
+            status = 503
+        body = json.dumps({'hits': self.server.hits}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestUpstreamClient(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.hits = 0
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{0}'.format(self.server.server_port)
+        self.client = UpstreamClient()
+
+    def tearDown(self):
+        self.client.session().close()
+        self.server.shutdown()
+        self.server.server_close()
+        current_app.config.from_object('project.config.TestingConfig')
+        super().tearDown()
+
+    def test_keep_alive(self):
+        for _ in range(3):
+            response = self.client.get(self.url + '/')
+            self.assertEqual(response.status_code, 200)
+        metrics = self.client.metrics()
+        self.assertEqual(metrics['requests'], 3)
+        self.assertEqual(metrics['errors'], 0)
+        self.assertEqual(len(metrics['pools']), 1)
+        self.assertEqual(metrics['pools'][0]['connections_opened'], 1)
+        self.assertEqual(metrics['pools'][0]['requests'], 3)
+        self.assertEqual(metrics['pools'][0]['idle'], 1)
+
+    def test_retry(self):
+        response = self.client.get(self.url + '/flaky')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.hits, 3)
+
+    def test_read_timeout(self):
+        current_app.config['UPSTREAM_READ_TIMEOUT'] = 0.1
+        current_app.config['UPSTREAM_RETRIES'] = 0
+        with self.assertRaises(requests.RequestException):
+            self.client.get(self.url + '/slow')
+        self.assertEqual(self.client.metrics()['errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
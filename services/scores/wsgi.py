@@ -0,0 +1,7 @@
+# services/scores/wsgi.py
+
+
+from project import create_app
+
+
+app = create_app()
@@ -10,4 +10,7 @@ echo "PostgreSQL started"
 
 python manage.py recreate-db
 python manage.py seed-db
-gunicorn -b 0.0.0.0:5000 manage:app
\ No newline at end of file
+# threaded workers, so a request waiting on a password hash only holds
+# a thread and the hashes of one worker can run on every core
+gunicorn --worker-class gthread --threads ${GUNICORN_THREADS:-16} \
+  -b 0.0.0.0:5000 wsgi:app
\ No newline at end of file
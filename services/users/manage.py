@@ -1,11 +1,21 @@
+import os
+import random
 import sys
+import time
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 
+import click
 import coverage
+from flask import current_app
 from flask.cli import FlaskGroup
 
 from project import create_app, db
 from project.api.models import User
+from project.hashing import hash_password
+from project.seed import (
+    seed_users, synthetic_users, write_exercises, write_scores
+)
 
 COV = coverage.coverage(
     branch=True,
@@ -16,15 +26,16 @@ COV = coverage.coverage(
     ]
 )
 
-COV.start()
-
-app = create_app()
 cli = FlaskGroup(create_app=create_app)
 
 
 @cli.command()
 def cov():
     """Runs the unit tests with coverage."""
+    COV.start()
+    # re-import the app under the tracer so module-level code is measured
+    for name in [m for m in sys.modules if m.split('.')[0] == 'project']:
+        del sys.modules[name]
     tests = unittest.TestLoader().discover('project/tests')
     result = unittest.TextTestRunner(verbosity=2).run(tests)
     if result.wasSuccessful():
@@ -55,10 +66,80 @@ def test():
 
 
 @cli.command()
-def seed_db():
-    db.session.add(User(username='seed1', email="seed1@mail.com", password='greaterthaneight'))
-    db.session.add(User(username='seed2', email="seed2@mail.org", password='greaterthaneight'))
-    db.session.commit()
+@click.option('--users', 'count', default=0,
+              help='Generate this many synthetic users instead.')
+@click.option('--start', default=1,
+              help='Number of the first synthetic user.')
+@click.option('--password', default='greaterthaneight',
+              help='Password of every synthetic user.')
+@click.option('--reuse-hash', is_flag=True,
+              help='Hash the password once and share it between users.')
+@click.option('--workers', default=None, type=int,
+              help='Processes hashing passwords, default one per core.')
+@click.option('--chunk-size', default=10000,
+              help='Users loaded per COPY and transaction.')
+@click.option('--dataset-dir', default=None,
+              help='Also write exercises.csv and scores.csv here.')
+@click.option('--exercises', default=100,
+              help='Exercises in the dataset.')
+@click.option('--scores-per-user', default=10,
+              help='Scores per user in the dataset.')
+def seed_db(count, start, password, reuse_hash, workers, chunk_size,
+            dataset_dir, exercises, scores_per_user):
+    if not count:
+        db.session.add(User(username='seed1', email="seed1@mail.com", password='greaterthaneight'))
+        db.session.add(User(username='seed2', email="seed2@mail.org", password='greaterthaneight'))
+        db.session.commit()
+        return
+
+    rounds = current_app.config.get('BCRYPT_LOG_ROUNDS')
+    pool = None
+    if reuse_hash:
+        pw_hash, _ = hash_password(password, rounds)
+
+        def hash_passwords(n):
+            return [pw_hash] * n
+    else:
+        pool = ProcessPoolExecutor(workers)
+
+        def hash_passwords(n):
+            return [pw_hash for pw_hash, _ in pool.map(
+                hash_password, [password] * n, [rounds] * n, chunksize=64)]
+
+    scores = None
+    if dataset_dir:
+        os.makedirs(dataset_dir, exist_ok=True)
+        with open(os.path.join(dataset_dir, 'exercises.csv'), 'w') as f:
+            write_exercises(f, exercises)
+        scores = open(os.path.join(dataset_dir, 'scores.csv'), 'w')
+    rng = random.Random(start)
+
+    started = time.perf_counter()
+    created = 0
+    try:
+        users = synthetic_users(count, start)
+        for user_ids in seed_users(users, hash_passwords, chunk_size):
+            created += len(user_ids)
+            if scores is not None:
+                write_scores(scores, user_ids, exercises, scores_per_user, rng)
+            click.echo('{0} users created in {1:.0f}s'.format(
+                created, time.perf_counter() - started))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if scores is not None:
+            scores.close()
+    if dataset_dir:
+        click.echo(
+            'Load the datasets with psql:\n'
+            '  exercises: \\copy exercises (id, body, test_code, '
+            'test_code_solution) FROM exercises.csv WITH (FORMAT csv)\n'
+            "    then SELECT setval('exercises_id_seq', max(id)) "
+            'FROM exercises;\n'
+            '  scores: \\copy scores (user_id, exercise_id, correct) '
+            'FROM scores.csv WITH (FORMAT csv)\n'
+            '    then python manage.py rebuild_summaries'
+        )
 
 
 if __name__ == '__main__':
@@ -7,11 +7,18 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 
+from project.hashing import PasswordHasher
+from project.admission import AdmissionController
+from project.cache import UserCache
+
 db = SQLAlchemy()
 toolbar = DebugToolbarExtension()
 cors = CORS()
 migrate = Migrate()
 bcrypt = Bcrypt()
+hasher = PasswordHasher()
+limiter = AdmissionController()
+user_cache = UserCache()
 
 
 def create_app(script_info=None):
@@ -25,6 +32,9 @@ def create_app(script_info=None):
     cors.init_app(app)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
+    hasher.init_app(app)
+    limiter.init_app(app)
+    user_cache.init_app(app)
 
     from project.api.users import users_blueprint
     app.register_blueprint(users_blueprint)
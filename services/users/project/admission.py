@@ -0,0 +1,110 @@
+import fcntl
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+
+from project.hashing import HashUnavailable
+
+
+class Overloaded(HashUnavailable):
+    """Raised when the host cannot admit another password hash."""
+
+
+class AdmissionController:
+    """Caps concurrent password hashes per host.
+
+    Each of the HASH_CONCURRENCY run slots and HASH_MAX_WAITERS wait slots
+    is a lock file under HASH_SLOT_DIR, so the limit is shared by every
+    gunicorn worker on the host. A caller that finds the run slots busy
+    takes a wait slot and polls for up to HASH_WAIT_TIMEOUT seconds; when
+    the wait slots are busy too it is shed immediately.
+
+    A waiting request holds its thread, so HASH_MAX_WAITERS defaults to 0
+    and overload is shed. Only raise it under threaded workers, and keep
+    it well below the thread count so cheap routes still find a thread.
+    """
+
+    poll_interval = 0.01
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.reset_metrics()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('HASH_CONCURRENCY', None)
+        app.config.setdefault('HASH_MAX_WAITERS', 0)
+        app.config.setdefault('HASH_WAIT_TIMEOUT', 2)
+        app.config.setdefault('HASH_RETRY_AFTER', 1)
+        app.config.setdefault('HASH_SLOT_DIR', None)
+
+    @contextmanager
+    def admit(self):
+        slot = self._acquire(current_app.config)
+        try:
+            yield
+        finally:
+            os.close(slot)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._metrics)
+
+    def reset_metrics(self):
+        with self._lock:
+            self._metrics = {
+                'admitted': 0,
+                'queued': 0,
+                'shed': 0,
+                'expired': 0,
+            }
+
+    def _acquire(self, config):
+        directory = config.get('HASH_SLOT_DIR') or os.path.join(
+            tempfile.gettempdir(), 'users-hash-slots')
+        os.makedirs(directory, exist_ok=True)
+        concurrency = config.get('HASH_CONCURRENCY') or os.cpu_count()
+
+        slot = self._try_lock(directory, 'run', concurrency)
+        if slot is not None:
+            self._count('admitted')
+            return slot
+        waiter = self._try_lock(
+            directory, 'wait', config.get('HASH_MAX_WAITERS'))
+        if waiter is None:
+            self._count('shed')
+            raise Overloaded('Too many password hashes in flight.')
+
+        self._count('queued')
+        try:
+            deadline = time.monotonic() + config.get('HASH_WAIT_TIMEOUT')
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                slot = self._try_lock(directory, 'run', concurrency)
+                if slot is not None:
+                    self._count('admitted')
+                    return slot
+            self._count('expired')
+            raise Overloaded('Timed out waiting for a password hash slot.')
+        finally:
+            os.close(waiter)
+
+    def _try_lock(self, directory, kind, count):
+        for i in range(count):
+            path = os.path.join(directory, f'{kind}-{i}.lock')
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def _count(self, name):
+        with self._lock:
+            self._metrics[name] += 1
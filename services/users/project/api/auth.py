@@ -2,9 +2,11 @@ from flask import Blueprint, jsonify, request
 from sqlalchemy import exc, or_
 
 from project.api.models import User
-from project import db, bcrypt
+from project import db, hasher, limiter
+from project.hashing import HashUnavailable
 
-from project.api.utils import authenticate
+from project.api.keys import public_keys, to_jwks
+from project.api.utils import authenticate, load_user, service_busy
 
 auth_blueprint = Blueprint('auth', __name__)
 
@@ -28,18 +30,23 @@ def register_user():
         if user:
             response_object['message'] = 'Sorry. That user already exists.'
             return jsonify(response_object), 400
-        new_user = User(
-            username=username,
-            email=email,
-            password=password
-        )
+        with limiter.admit():
+            new_user = User(
+                username=username,
+                email=email,
+                password=password
+            )
         db.session.add(new_user)
         db.session.commit()
-        auth_token = User.encode_auth_token(new_user.id)
+        auth_token = User.encode_auth_token(
+            new_user.id, new_user.active, new_user.admin)
         response_object['status'] = 'success'
         response_object['message'] = 'Successfully registered.'
         response_object['auth_token'] = auth_token.decode()
         return jsonify(response_object), 201
+    except HashUnavailable:
+        db.session.rollback()
+        return service_busy(response_object)
     except (exc.IntegrityError, ValueError):
         db.session.rollback()
         return jsonify(response_object), 400
@@ -57,8 +64,13 @@ def login_user():
     password = post_data.get('password')
     try:
         user = User.query.filter_by(email=email).first()
-        if user and bcrypt.check_password_hash(user.password, password):
-            auth_token = user.encode_auth_token(user.id)
+        valid = False
+        if user:
+            with limiter.admit():
+                valid = hasher.check_password_hash(user.password, password)
+        if valid:
+            auth_token = user.encode_auth_token(
+                user.id, user.active, user.admin)
             response_object['status'] = 'success'
             response_object['message'] = 'Successfully logged in.'
             response_object['auth_token'] = auth_token.decode()
@@ -66,6 +78,8 @@ def login_user():
         else:
             response_object['message'] = 'User does not exists.'
             return jsonify(response_object), 404
+    except HashUnavailable:
+        return service_busy(response_object)
     except Exception:
         response_object['message'] = 'Try again.'
         return jsonify(response_object), 500
@@ -84,10 +98,18 @@ def logout_user(resp):
 @auth_blueprint.route('/auth/status', methods=['GET'])
 @authenticate
 def get_user_status(resp):
-    user = User.query.filter_by(id=resp).first()
+    user = load_user(resp)
     response_object = {
         'status': 'success',
         'message': 'success',
         'data': user.to_json()
     }
     return jsonify(response_object), 200
+
+
+@auth_blueprint.route('/auth/keys', methods=['GET'])
+def get_keys():
+    """Public keys for verifying auth tokens, as a JSON Web Key Set."""
+    return jsonify(to_jwks(public_keys())), 200, {
+        'Cache-Control': 'public, max-age=300'
+    }
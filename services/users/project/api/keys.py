@@ -0,0 +1,53 @@
+import json
+from functools import lru_cache
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from flask import current_app
+from jwt.algorithms import RSAAlgorithm
+
+
+@lru_cache(maxsize=16)
+def load_public_key(pem):
+    """Public half of a PEM encoded RSA key, private or public."""
+    data = pem.encode()
+    if b'PRIVATE KEY' in data:
+        private_key = serialization.load_pem_private_key(
+            data, password=None, backend=default_backend())
+        return private_key.public_key()
+    return serialization.load_pem_public_key(data, backend=default_backend())
+
+
+def signing_key():
+    """Key, algorithm and headers used to sign new auth tokens.
+
+    Tokens are signed with RS256 once JWT_PRIVATE_KEY is configured, so the
+    other services can verify them with the published public key. Without
+    it they fall back to HS256 with SECRET_KEY.
+    """
+    private_key = current_app.config.get('JWT_PRIVATE_KEY')
+    if not private_key:
+        return current_app.config.get('SECRET_KEY'), 'HS256', None
+    headers = {'kid': current_app.config.get('JWT_KEY_ID')}
+    return private_key, 'RS256', headers
+
+
+def public_keys():
+    """Verification keys by key id: the current key and retired ones."""
+    config = current_app.config
+    keys = {}
+    if config.get('JWT_PRIVATE_KEY'):
+        keys[config.get('JWT_KEY_ID')] = load_public_key(
+            config.get('JWT_PRIVATE_KEY'))
+    for kid, pem in (config.get('JWT_RETIRED_KEYS') or {}).items():
+        keys.setdefault(kid, load_public_key(pem))
+    return keys
+
+
+def to_jwks(keys):
+    jwks = []
+    for kid, key in keys.items():
+        jwk = json.loads(RSAAlgorithm.to_jwk(key))
+        jwk.update({'kid': kid, 'alg': 'RS256', 'use': 'sig'})
+        jwks.append(jwk)
+    return {'keys': jwks}
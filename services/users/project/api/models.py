@@ -1,11 +1,13 @@
 import datetime
 
 from flask import current_app
+from sqlalchemy import event
 from sqlalchemy.sql import func
 import jwt
 from jwt.exceptions import PyJWTError
 
-from project import db, bcrypt
+from project import db, hasher, user_cache
+from project.api.keys import public_keys, signing_key
 
 
 class User(db.Model):
@@ -18,23 +20,18 @@ class User(db.Model):
     admin = db.Column(db.Boolean, default=False, nullable=False)
     created_date = db.Column(db.DateTime, default=func.now(), nullable=False)
 
+    json_columns = ('id', 'username', 'email', 'active', 'admin')
+
     def __init__(self, username, email, password):
         self.username = username
         self.email = email
-        self.password = bcrypt.generate_password_hash(
-            password, current_app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+        self.password = hasher.generate_password_hash(password)
 
     def to_json(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'active': self.active,
-            'admin': self.admin,
-        }
+        return {name: getattr(self, name) for name in self.json_columns}
 
     @staticmethod
-    def encode_auth_token(user_id):
+    def encode_auth_token(user_id, active=True, admin=False):
         """Generates the auth token"""
         try:
             payload = {
@@ -43,12 +40,16 @@ class User(db.Model):
                     seconds=current_app.config.get('TOKEN_EXPIRATION_SECONDS')
                 ),
                 'iat': datetime.datetime.utcnow(),
-                'sub': user_id
+                'sub': user_id,
+                'active': active,
+                'admin': admin
             }
+            key, algorithm, headers = signing_key()
             return jwt.encode(
                 payload,
-                current_app.config.get('SECRET_KEY'),
-                algorithm='HS256'
+                key,
+                algorithm=algorithm,
+                headers=headers
             )
         except PyJWTError as e:
             return e
@@ -56,13 +57,29 @@ class User(db.Model):
     @staticmethod
     def decode_auth_token(auth_token):
         try:
+            header = jwt.get_unverified_header(auth_token)
+            if header.get('alg') == 'RS256':
+                key = public_keys().get(header.get('kid'))
+                if key is None:
+                    raise jwt.InvalidTokenError('Unknown key id.')
+                algorithms = ['RS256']
+            else:
+                key = current_app.config.get('SECRET_KEY')
+                algorithms = ['HS256']
             payload = jwt.decode(
                 jwt=auth_token,
-                key=current_app.config.get('SECRET_KEY'),
-                algorithms=['HS256']
+                key=key,
+                algorithms=algorithms
             )
             return payload['sub']
         except jwt.ExpiredSignatureError:
             return 'Signature expired. Please log in again.'
         except jwt.InvalidTokenError:
             return 'Invalid token. Please log in again.'
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
@@ -1,14 +1,25 @@
 from flask import (
     Blueprint,
+    Response,
+    current_app,
     jsonify,
     request,
     render_template,
+    stream_with_context,
 )
 from sqlalchemy import exc
 
 from project.api.models import User
-from project import db
-from project.api.utils import authenticate, admin_required
+from project import db, hasher, limiter, user_cache
+from project.hashing import HashUnavailable
+from project.api.utils import (
+    authenticate,
+    admin_required,
+    fetch_json,
+    select_json,
+    service_busy,
+    stream_json,
+)
 
 users_blueprint = Blueprint('users', __name__, template_folder='./templates')
 
@@ -19,11 +30,19 @@ def index():
         username = request.form['username']
         email = request.form['email']
         password = request.form['password']
-        db.session.add(User(
-            username=username,
-            email=email,
-            password=password, ))
-        db.session.commit()
+        try:
+            with limiter.admit():
+                user = User(
+                    username=username,
+                    email=email,
+                    password=password, )
+            db.session.add(user)
+            db.session.commit()
+        except HashUnavailable:
+            db.session.rollback()
+            retry_after = current_app.config.get('HASH_RETRY_AFTER')
+            return 'Service busy. Try again later.', 503, \
+                {'Retry-After': str(retry_after)}
     users = User.query.all()
     return render_template('index.html', users=users)
 
@@ -57,20 +76,39 @@ def add_user(resp):
             response_object['message'] = 'Sorry. That email already exists.'
             return jsonify(response_object), 400
 
-        db.session.add(User(
-            username=username,
-            email=email,
-            password=password, )
-        )
+        with limiter.admit():
+            user = User(
+                username=username,
+                email=email,
+                password=password, )
+        db.session.add(user)
         db.session.commit()
         response_object['status'] = 'success'
         response_object['message'] = f'{email} was added!'
         return jsonify(response_object), 201
+    except HashUnavailable:
+        db.session.rollback()
+        return service_busy(response_object)
     except (exc.IntegrityError, ValueError):
         db.session.rollback()
         return jsonify(response_object), 400
 
 
+@users_blueprint.route('/users/metrics', methods=['GET'])
+@authenticate
+@admin_required
+def get_metrics(resp):
+    response_object = {
+        'status': 'success',
+        'data': {
+            'hashing': hasher.metrics(),
+            'admission': limiter.metrics(),
+            'user_cache': user_cache.stats(),
+        }
+    }
+    return jsonify(response_object), 200
+
+
 @users_blueprint.route('/users/<user_id>', methods=['GET'])
 def get_single_user(user_id):
     response_object = {
@@ -97,10 +135,47 @@ def get_single_user(user_id):
 
 @users_blueprint.route('/users', methods=['GET'])
 def get_all_users():
+    """Get all users.
+
+    Without query parameters the whole table is returned in one payload.
+    `limit` and `after` page through users by id (keyset pagination), and
+    `format=ndjson` streams one user per line from a server-side cursor.
+    """
+    response_object = {
+        'status': 'fail',
+        'message': 'Invalid pagination parameters.'
+    }
+    try:
+        limit = request.args.get('limit')
+        if limit is not None:
+            limit = int(limit)
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify(response_object), 400
+    if (limit is not None and limit < 1) or after < 0:
+        return jsonify(response_object), 400
+
+    query = select_json(User).where(User.id > after).order_by(User.id)
+    if limit is not None:
+        limit = min(limit, current_app.config.get('USERS_PAGE_MAX_LIMIT'))
+        query = query.limit(limit)
+
+    if request.args.get('format') == 'ndjson':
+        batch_size = current_app.config.get('USERS_STREAM_BATCH_SIZE')
+        return Response(
+            stream_with_context(stream_json(query, batch_size)),
+            mimetype='application/x-ndjson'
+        )
+
+    users = fetch_json(query)
     response_object = {
         'status': 'success',
         'data': {
-            'users': [user.to_json() for user in User.query.all()]
+            'users': users
         }
     }
+    if limit is not None:
+        full_page = len(users) == limit
+        response_object['data']['next'] = \
+            users[-1]['id'] if full_page else None
     return jsonify(response_object), 200
@@ -1,13 +1,37 @@
+import json
 from functools import wraps
 
-from flask import request, jsonify
+from flask import _request_ctx_stack, current_app, request, jsonify
+from sqlalchemy import select
 
+from project import db, user_cache
 from project.api.models import User
 
 
+def load_user(user_id):
+    """Return the user for this request, querying the database once."""
+    ctx = _request_ctx_stack.top
+    user = getattr(ctx, 'current_user', None)
+    if user is None or user.id != user_id:
+        user = User.query.filter_by(id=user_id).first()
+        ctx.current_user = user
+    return user
+
+
+def user_flags(user_id):
+    """Return the cached active/admin flags of a user, or None."""
+    flags = user_cache.get(user_id)
+    if flags is None:
+        user = load_user(user_id)
+        if not user:
+            return None
+        flags = {'active': user.active, 'admin': user.admin}
+        user_cache.set(user_id, flags)
+    return flags
+
+
 def is_admin(user_id):
-    user = User.query.filter_by(id=user_id).first()
-    return user.admin
+    return user_flags(user_id)['admin']
 
 
 def authenticate(f):
@@ -26,8 +50,8 @@ def authenticate(f):
             response_object['message'] = resp
             return jsonify(response_object), 401
 
-        user = User.query.filter_by(id=resp).first()
-        if not user or not user.active:
+        flags = user_flags(resp)
+        if not flags or not flags['active']:
             return jsonify(response_object), 401
 
         return f(resp, *args, **kwargs)
@@ -35,6 +59,12 @@ def authenticate(f):
     return decorated_function
 
 
+def service_busy(response_object):
+    response_object['message'] = 'Service busy. Try again later.'
+    retry_after = current_app.config.get('HASH_RETRY_AFTER')
+    return jsonify(response_object), 503, {'Retry-After': str(retry_after)}
+
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(resp, *args, **kwargs):
@@ -47,3 +77,27 @@ def admin_required(f):
         return f(resp, *args, **kwargs)
 
     return decorated_function
+
+
+def select_json(model):
+    """Core select of the columns serialized by model.to_json."""
+    return select([model.__table__.c[name] for name in model.json_columns])
+
+
+def fetch_json(statement):
+    """Run a Core select and return its rows as dicts, bypassing the ORM."""
+    result = db.session.execute(statement)
+    keys = result.keys()
+    return [dict(zip(keys, row)) for row in result]
+
+
+def stream_json(statement, batch_size):
+    """Run a Core select on a server-side cursor, yielding NDJSON lines."""
+    result = db.session.execute(
+        statement.execution_options(stream_results=True))
+    keys = result.keys()
+    rows = result.fetchmany(batch_size)
+    while rows:
+        for row in rows:
+            yield json.dumps(dict(zip(keys, row))) + '\n'
+        rows = result.fetchmany(batch_size)
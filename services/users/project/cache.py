@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """Bounded LRU cache of per-user flags with a time-to-live.
+
+    Entries are dropped when the User row changes in this process; other
+    workers pick the change up once USER_CACHE_TTL seconds have passed.
+    USER_CACHE_SIZE = 0 disables the cache.
+    """
+
+    def __init__(self, app=None, timer=time.monotonic):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._timer = timer
+        self.maxsize = 0
+        self.ttl = 0
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CACHE_SIZE', 10000)
+        app.config.setdefault('USER_CACHE_TTL', 30)
+        self.maxsize = app.config['USER_CACHE_SIZE']
+        self.ttl = app.config['USER_CACHE_TTL']
+        self.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._timer():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
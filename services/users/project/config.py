@@ -1,3 +1,4 @@
+import json
 import os
 
 
@@ -11,12 +12,30 @@ class BaseConfig:
     BCRYPT_LOG_ROUNDS = 13
     TOKEN_EXPIRATION_DAYS = 30
     TOKEN_EXPIRATION_SECONDS = 0
+    JWT_PRIVATE_KEY = os.environ.get('JWT_PRIVATE_KEY')
+    JWT_KEY_ID = os.environ.get('JWT_KEY_ID', 'users-1')
+    JWT_RETIRED_KEYS = json.loads(os.environ.get('JWT_RETIRED_KEYS', '{}'))
+    USERS_PAGE_MAX_LIMIT = 1000
+    USERS_STREAM_BATCH_SIZE = 1000
+    PASSWORD_HASH_BACKEND = 'process'
+    PASSWORD_HASH_WORKERS = None
+    PASSWORD_HASH_QUEUE_SIZE = 64
+    PASSWORD_HASH_TIMEOUT = 5
+    HASH_CONCURRENCY = None
+    # waiting holds a request thread; shed overload unless asked to park it
+    HASH_MAX_WAITERS = int(os.environ.get('HASH_MAX_WAITERS', 0))
+    HASH_WAIT_TIMEOUT = 2
+    HASH_RETRY_AFTER = 1
+    HASH_SLOT_DIR = os.environ.get('HASH_SLOT_DIR')
+    USER_CACHE_SIZE = 10000
+    USER_CACHE_TTL = 30
 
 
 class DevelopmentConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     DEBUG_TB_ENABLED = True
     BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_BACKEND = 'inline'
 
 
 class TestingConfig(BaseConfig):
@@ -25,6 +44,7 @@ class TestingConfig(BaseConfig):
     BCRYPT_LOG_ROUNDS = 4
     TOKEN_EXPIRATION_DAYS = 0
     TOKEN_EXPIRATION_SECONDS = 3
+    PASSWORD_HASH_BACKEND = 'inline'
 
 
 class ProductionConfig(BaseConfig):
@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+from flask_bcrypt import check_password_hash, generate_password_hash
+
+
+class HashUnavailable(Exception):
+    """Raised when a password hash cannot be computed right now."""
+
+
+def hash_password(password, rounds):
+    started = time.perf_counter()
+    pw_hash = generate_password_hash(password, rounds).decode()
+    return pw_hash, time.perf_counter() - started
+
+
+def check_password(pw_hash, password):
+    started = time.perf_counter()
+    matches = check_password_hash(pw_hash, password)
+    return matches, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """Runs bcrypt off the request thread.
+
+    With PASSWORD_HASH_BACKEND = 'process' every hash is submitted to a
+    per-worker process pool, so a burst of logins is spread across cores.
+    The calling thread waits for its hash, so this only pays off under a
+    threaded worker class: the entrypoints run gunicorn's gthread workers,
+    whose other threads keep serving while one waits. Submissions
+    beyond PASSWORD_HASH_QUEUE_SIZE and calls that take longer than
+    PASSWORD_HASH_TIMEOUT seconds raise HashUnavailable. The 'inline'
+    backend hashes in the calling thread.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self.reset_metrics()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_BACKEND', 'inline')
+        app.config.setdefault('PASSWORD_HASH_WORKERS', None)
+        app.config.setdefault('PASSWORD_HASH_QUEUE_SIZE', 64)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 5)
+
+    def generate_password_hash(self, password):
+        rounds = current_app.config.get('BCRYPT_LOG_ROUNDS')
+        return self._run(hash_password, password, rounds)
+
+    def check_password_hash(self, pw_hash, password):
+        return self._run(check_password, pw_hash, password)
+
+    def metrics(self):
+        with self._lock:
+            completed = self._completed
+            return {
+                'backend': current_app.config.get('PASSWORD_HASH_BACKEND'),
+                'queue_depth': self._in_flight,
+                'max_queue_depth': self._max_in_flight,
+                'completed': completed,
+                'rejected': self._rejected,
+                'timeouts': self._timeouts,
+                'hash_time_avg':
+                    self._hash_time / completed if completed else 0.0,
+                'hash_time_max': self._hash_time_max,
+                'wait_time_avg':
+                    self._wait_time / completed if completed else 0.0,
+            }
+
+    def reset_metrics(self):
+        with self._lock:
+            self._in_flight = 0
+            self._max_in_flight = 0
+            self._completed = 0
+            self._rejected = 0
+            self._timeouts = 0
+            self._hash_time = 0.0
+            self._hash_time_max = 0.0
+            self._wait_time = 0.0
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None and self._pid == os.getpid():
+            pool.shutdown(wait=True)
+
+    def _run(self, func, *args):
+        config = current_app.config
+        if config.get('PASSWORD_HASH_BACKEND') != 'process':
+            result, elapsed = func(*args)
+            self._record(elapsed, 0.0)
+            return result
+
+        with self._lock:
+            if self._in_flight >= config.get('PASSWORD_HASH_QUEUE_SIZE'):
+                self._rejected += 1
+                raise HashUnavailable('Password hashing queue is full.')
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        submitted = time.perf_counter()
+        try:
+            future = self._executor(config).submit(func, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._discard_pool()
+            self._release()
+            raise HashUnavailable('Password hashing pool is unavailable.')
+        future.add_done_callback(self._release)
+
+        try:
+            result, elapsed = future.result(
+                timeout=config.get('PASSWORD_HASH_TIMEOUT'))
+        except TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise HashUnavailable('Password hashing timed out.')
+        except BrokenProcessPool:
+            self._discard_pool()
+            raise HashUnavailable('Password hashing pool is unavailable.')
+        self._record(elapsed, time.perf_counter() - submitted - elapsed)
+        return result
+
+    def _executor(self, config):
+        with self._lock:
+            # a pool inherited across fork() belongs to the parent process
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=config.get('PASSWORD_HASH_WORKERS'))
+                self._pid = os.getpid()
+            return self._pool
+
+    def _discard_pool(self):
+        with self._lock:
+            self._pool = None
+
+    def _release(self, future=None):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _record(self, elapsed, waited):
+        with self._lock:
+            self._completed += 1
+            self._hash_time += elapsed
+            self._hash_time_max = max(self._hash_time_max, elapsed)
+            self._wait_time += max(waited, 0.0)
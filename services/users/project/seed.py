@@ -0,0 +1,107 @@
+import csv
+import io
+import random
+from itertools import islice
+from math import factorial
+
+from project import db
+
+
+FIRST_NAMES = (
+    'james', 'mary', 'john', 'patricia', 'robert', 'jennifer', 'michael',
+    'linda', 'william', 'elizabeth', 'david', 'barbara', 'richard', 'susan',
+    'joseph', 'jessica', 'thomas', 'sarah', 'charles', 'karen', 'wei', 'yan',
+    'aarav', 'priya', 'mohammed', 'fatima', 'lucas', 'sofia', 'ivan', 'olga',
+)
+LAST_NAMES = (
+    'smith', 'johnson', 'williams', 'brown', 'jones', 'garcia', 'miller',
+    'davis', 'rodriguez', 'martinez', 'hernandez', 'lopez', 'wilson',
+    'anderson', 'thomas', 'taylor', 'moore', 'jackson', 'martin', 'lee',
+    'zhang', 'wang', 'sharma', 'patel', 'khan', 'silva', 'ivanov', 'kim',
+)
+DOMAINS = (
+    'gmail.com', 'yahoo.com', 'outlook.com', 'hotmail.com', 'mail.com',
+    'icloud.com', 'proton.me', 'example.org',
+)
+EXERCISES = (
+    ('Define a function called sum that takes two integers as arguments '
+     'and returns their sum.', 'sum(2, {0})', lambda n: str(2 + n)),
+    ('Define a function called reverse that takes a string as an argument '
+     'and returns the string in reversed order.',
+     'reverse("racecar{0}")', lambda n: '{0}racecar'.format(str(n)[::-1])),
+    ('Define a function called factorial that takes a random number as an '
+     'argument and then returns the factorial of that given number.',
+     'factorial({0})', lambda n: str(factorial(n))),
+)
+
+
+def synthetic_users(count, start=1, seed=0):
+    """Yield (username, email) pairs for users start .. start + count - 1.
+
+    The number keeps every account unique, so re-running with the same
+    start produces the same users.
+    """
+    rng = random.Random(seed)
+    for n in range(start, start + count):
+        username = '{0}.{1}{2}'.format(
+            rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), n)
+        yield username, '{0}@{1}'.format(username, rng.choice(DOMAINS))
+
+
+def seed_users(users, hash_passwords, chunk_size=10000):
+    """Bulk load users, yielding the ids created by each chunk.
+
+    users yields (username, email) pairs and hash_passwords(n) returns n
+    password hashes. Every chunk is streamed into a temporary table with
+    COPY and moved into users in its own transaction, skipping usernames
+    and emails that already exist, so an interrupted seed can be re-run.
+    """
+    users = iter(users)
+    chunk = list(islice(users, chunk_size))
+    while chunk:
+        cursor = db.session.connection().connection.cursor()
+        cursor.execute(
+            'CREATE TEMP TABLE IF NOT EXISTS users_seed '
+            '(username varchar(128), email varchar(128), '
+            'password varchar(255)) ON COMMIT DELETE ROWS'
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(
+            (username, email, pw_hash) for (username, email), pw_hash
+            in zip(chunk, hash_passwords(len(chunk))))
+        buffer.seek(0)
+        cursor.copy_expert(
+            'COPY users_seed (username, email, password) '
+            'FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(
+            'INSERT INTO users '
+            '(username, email, password, active, admin, created_date) '
+            'SELECT username, email, password, true, false, now() '
+            'FROM users_seed ON CONFLICT DO NOTHING RETURNING id'
+        )
+        user_ids = [row[0] for row in cursor.fetchall()]
+        db.session.commit()
+        yield user_ids
+        chunk = list(islice(users, chunk_size))
+
+
+def write_exercises(stream, count):
+    """Write count exercises as CSV rows for the exercises table."""
+    writer = csv.writer(stream)
+    for exercise_id in range(1, count + 1):
+        body, test_code, solution = EXERCISES[exercise_id % len(EXERCISES)]
+        # keep factorials small enough to read
+        n = exercise_id % 20
+        writer.writerow(
+            (exercise_id, body, test_code.format(n), solution(n)))
+
+
+def write_scores(stream, user_ids, exercise_count, per_user, rng):
+    """Write per_user random scores for each user as CSV rows."""
+    writer = csv.writer(stream)
+    per_user = min(per_user, exercise_count)
+    for user_id in user_ids:
+        for exercise_id in rng.sample(range(1, exercise_count + 1), per_user):
+            writer.writerow(
+                (user_id, exercise_id, 't' if rng.random() < 0.6 else 'f'))
@@ -1,6 +1,6 @@
 from flask_testing import TestCase
 
-from project import create_app, db
+from project import create_app, db, user_cache
 
 app = create_app()
 
@@ -13,6 +13,7 @@ class BaseTestCase(TestCase):
     def setUp(self):
         db.create_all()
         db.session.commit()
+        user_cache.clear()
 
     def tearDown(self):
         db.session.remove()
@@ -0,0 +1,91 @@
+import json
+import shutil
+import tempfile
+import unittest
+
+from flask import current_app
+
+from project import limiter
+from project.admission import Overloaded
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user
+
+
+class TestAdmissionController(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.slot_dir = tempfile.mkdtemp()
+        current_app.config['HASH_SLOT_DIR'] = self.slot_dir
+        current_app.config['HASH_CONCURRENCY'] = 1
+        current_app.config['HASH_MAX_WAITERS'] = 0
+        current_app.config['HASH_WAIT_TIMEOUT'] = 0.05
+        limiter.reset_metrics()
+
+    def tearDown(self):
+        current_app.config.from_object('project.config.TestingConfig')
+        shutil.rmtree(self.slot_dir)
+        super().tearDown()
+
+    def test_admit(self):
+        with limiter.admit():
+            pass
+        with limiter.admit():
+            pass
+        self.assertEqual(limiter.metrics()['admitted'], 2)
+
+    def test_shed_when_queue_full(self):
+        with limiter.admit():
+            with self.assertRaises(Overloaded):
+                with limiter.admit():
+                    pass
+        self.assertEqual(limiter.metrics()['shed'], 1)
+
+    def test_expire_waiting(self):
+        current_app.config['HASH_MAX_WAITERS'] = 1
+        with limiter.admit():
+            with self.assertRaises(Overloaded):
+                with limiter.admit():
+                    pass
+        metrics = limiter.metrics()
+        self.assertEqual(metrics['queued'], 1)
+        self.assertEqual(metrics['expired'], 1)
+
+    def test_login_shed(self):
+        add_user('test', 'test@test.com', 'greaterthaneight')
+        with limiter.admit():
+            response = self.client.post(
+                '/auth/login',
+                data=json.dumps({
+                    'email': 'test@test.com',
+                    'password': 'greaterthaneight'
+                }),
+                content_type='application/json'
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+            self.assertIn('fail', data['status'])
+            self.assertIn('Service busy. Try again later.', data['message'])
+
+            response = self.client.get('/users/ping')
+            self.assertEqual(response.status_code, 200)
+
+    def test_register_shed(self):
+        with limiter.admit():
+            response = self.client.post(
+                '/auth/register',
+                data=json.dumps({
+                    'username': 'test',
+                    'email': 'test@test.com',
+                    'password': 'greaterthaneight',
+                }),
+                content_type='application/json'
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+            self.assertIn('Service busy. Try again later.', data['message'])
+
+
+if __name__ == '__main__':
+    unittest.main()
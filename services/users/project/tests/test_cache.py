@@ -0,0 +1,99 @@
+import json
+import unittest
+
+from project import db, user_cache
+from project.api.models import User
+from project.cache import UserCache
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user, count_queries
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestUserCache(unittest.TestCase):
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.cache = UserCache(timer=self.timer)
+        self.cache.maxsize = 2
+        self.cache.ttl = 10
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get(1))
+        self.cache.set(1, {'active': True})
+        self.assertEqual(self.cache.get(1), {'active': True})
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.5)
+        self.assertEqual(stats['size'], 1)
+
+    def test_ttl(self):
+        self.cache.set(1, {'active': True})
+        self.timer.now = 11
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_lru_eviction(self):
+        self.cache.set(1, 'one')
+        self.cache.set(2, 'two')
+        self.cache.get(1)
+        self.cache.set(3, 'three')
+        self.assertEqual(self.cache.get(1), 'one')
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.get(3), 'three')
+
+    def test_invalidate(self):
+        self.cache.set(1, 'one')
+        self.cache.invalidate(1)
+        self.assertIsNone(self.cache.get(1))
+
+    def test_disabled(self):
+        self.cache.maxsize = 0
+        self.cache.set(1, 'one')
+        self.assertIsNone(self.cache.get(1))
+
+
+class TestAuthenticateCache(BaseTestCase):
+    def login(self):
+        add_user('test', 'test@test.com', 'greaterthaneight')
+        resp_login = self.client.post(
+            '/auth/login',
+            data=json.dumps({
+                'email': 'test@test.com',
+                'password': 'greaterthaneight'
+            }),
+            content_type='application/json'
+        )
+        token = json.loads(resp_login.data.decode())['auth_token']
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_cache_hit_skips_query(self):
+        headers = self.login()
+        self.client.get('/auth/logout', headers=headers)
+        with count_queries() as statements:
+            response = self.client.get('/auth/logout', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(statements), 0)
+        self.assertEqual(user_cache.stats()['hits'], 1)
+
+    def test_update_invalidates(self):
+        headers = self.login()
+        response = self.client.get('/auth/logout', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        user = User.query.filter_by(email='test@test.com').first()
+        user.active = False
+        db.session.commit()
+        response = self.client.get('/auth/logout', headers=headers)
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Provide a valid auth token.', data['message'])
+
+
+if __name__ == '__main__':
+    unittest.main()
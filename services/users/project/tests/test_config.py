@@ -47,6 +47,7 @@ class TestTestingConfig(TestCase):
         self.assertTrue(app.config['BCRYPT_LOG_ROUNDS'] == 4)
         self.assertTrue(app.config['TOKEN_EXPIRATION_DAYS'] == 0)
         self.assertTrue(app.config['TOKEN_EXPIRATION_SECONDS'] == 3)
+        self.assertTrue(app.config['PASSWORD_HASH_BACKEND'] == 'inline')
 
 
 class TestProductionConfig(TestCase):
@@ -61,6 +62,8 @@ class TestProductionConfig(TestCase):
         self.assertTrue(app.config['BCRYPT_LOG_ROUNDS'] == 13)
         self.assertTrue(app.config['TOKEN_EXPIRATION_DAYS'] == 30)
         self.assertTrue(app.config['TOKEN_EXPIRATION_SECONDS'] == 0)
+        self.assertTrue(app.config['PASSWORD_HASH_BACKEND'] == 'process')
+        self.assertTrue(app.config['HASH_MAX_WAITERS'] == 0)
 
 
 if __name__ == '__main__':
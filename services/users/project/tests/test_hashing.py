@@ -0,0 +1,123 @@
+import json
+import threading
+import unittest
+
+from flask import current_app
+
+from project import hasher
+from project.hashing import HashUnavailable
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user
+
+
+class TestPasswordHasher(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        hasher.reset_metrics()
+
+    def tearDown(self):
+        current_app.config['PASSWORD_HASH_BACKEND'] = 'inline'
+        current_app.config['PASSWORD_HASH_QUEUE_SIZE'] = 64
+        current_app.config['PASSWORD_HASH_TIMEOUT'] = 5
+        current_app.config.from_object('project.config.TestingConfig')
+        hasher.shutdown()
+        super().tearDown()
+
+    def test_inline_hash(self):
+        pw_hash = hasher.generate_password_hash('greaterthaneight')
+        self.assertTrue(hasher.check_password_hash(
+            pw_hash, 'greaterthaneight'))
+        self.assertFalse(hasher.check_password_hash(pw_hash, 'wrong'))
+        metrics = hasher.metrics()
+        self.assertEqual(metrics['backend'], 'inline')
+        self.assertEqual(metrics['completed'], 3)
+        self.assertEqual(metrics['queue_depth'], 0)
+
+    def test_process_hash(self):
+        current_app.config['PASSWORD_HASH_BACKEND'] = 'process'
+        pw_hash = hasher.generate_password_hash('greaterthaneight')
+        self.assertTrue(hasher.check_password_hash(
+            pw_hash, 'greaterthaneight'))
+        self.assertFalse(hasher.check_password_hash(pw_hash, 'wrong'))
+        metrics = hasher.metrics()
+        self.assertEqual(metrics['backend'], 'process')
+        self.assertEqual(metrics['completed'], 3)
+        self.assertEqual(metrics['max_queue_depth'], 1)
+        self.assertGreater(metrics['hash_time_max'], 0)
+
+    def test_process_hash_threads(self):
+        """Ensure threads of one worker hash in parallel, as under gthread."""
+        current_app.config['PASSWORD_HASH_BACKEND'] = 'process'
+        current_app.config['BCRYPT_LOG_ROUNDS'] = 10
+        app = current_app._get_current_object()
+        hashes = []
+
+        def login():
+            with app.app_context():
+                hashes.append(hasher.generate_password_hash('greaterthan'))
+
+        threads = [threading.Thread(target=login) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(hashes), 4)
+        self.assertGreater(hasher.metrics()['max_queue_depth'], 1)
+
+    def test_process_hash_invalid_password(self):
+        current_app.config['PASSWORD_HASH_BACKEND'] = 'process'
+        with self.assertRaises(ValueError):
+            hasher.generate_password_hash(None)
+        self.assertEqual(hasher.metrics()['queue_depth'], 0)
+
+    def test_process_hash_queue_full(self):
+        current_app.config['PASSWORD_HASH_BACKEND'] = 'process'
+        current_app.config['PASSWORD_HASH_QUEUE_SIZE'] = 0
+        with self.assertRaises(HashUnavailable):
+            hasher.generate_password_hash('greaterthaneight')
+        self.assertEqual(hasher.metrics()['rejected'], 1)
+
+    def test_process_hash_timeout(self):
+        current_app.config['PASSWORD_HASH_BACKEND'] = 'process'
+        current_app.config['PASSWORD_HASH_TIMEOUT'] = 0
+        with self.assertRaises(HashUnavailable):
+            hasher.generate_password_hash('greaterthaneight')
+        self.assertEqual(hasher.metrics()['timeouts'], 1)
+
+    def test_register_queue_full(self):
+        current_app.config['PASSWORD_HASH_BACKEND'] = 'process'
+        current_app.config['PASSWORD_HASH_QUEUE_SIZE'] = 0
+        with self.client:
+            response = self.client.post(
+                '/auth/register',
+                data=json.dumps({
+                    'username': 'test',
+                    'email': 'test@test.com',
+                    'password': 'greaterthaneight',
+                }),
+                content_type='application/json'
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 503)
+            self.assertIn('fail', data['status'])
+            self.assertIn('Service busy. Try again later.', data['message'])
+
+    def test_login_process_backend(self):
+        add_user('test', 'test@test.com', 'greaterthaneight')
+        current_app.config['PASSWORD_HASH_BACKEND'] = 'process'
+        with self.client:
+            response = self.client.post(
+                '/auth/login',
+                data=json.dumps({
+                    'email': 'test@test.com',
+                    'password': 'greaterthaneight'
+                }),
+                content_type='application/json'
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(data['auth_token'])
+
+
+if __name__ == '__main__':
+    unittest.main()
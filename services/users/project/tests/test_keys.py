@@ -0,0 +1,130 @@
+import datetime
+import json
+import unittest
+
+import jwt
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from flask import current_app
+from jwt.algorithms import RSAAlgorithm
+
+from project.api.models import User
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user
+
+
+def generate_pem():
+    key = rsa.generate_private_key(
+        public_exponent=65537, key_size=2048, backend=default_backend())
+    return key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode()
+
+
+class TestSigningKeys(BaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.private_pem = generate_pem()
+        cls.retired_pem = generate_pem()
+
+    def setUp(self):
+        super().setUp()
+        current_app.config['JWT_PRIVATE_KEY'] = self.private_pem
+        current_app.config['JWT_KEY_ID'] = 'test-2'
+        current_app.config['TOKEN_EXPIRATION_SECONDS'] = 30
+
+    def tearDown(self):
+        current_app.config.from_object('project.config.TestingConfig')
+        super().tearDown()
+
+    def test_encode_rs256(self):
+        user = add_user('test', 'test@test.com', 'greaterthaneight')
+        auth_token = User.encode_auth_token(user.id, True, False)
+        header = jwt.get_unverified_header(auth_token)
+        self.assertEqual(header['alg'], 'RS256')
+        self.assertEqual(header['kid'], 'test-2')
+        self.assertEqual(User.decode_auth_token(auth_token), user.id)
+        claims = jwt.decode(auth_token, verify=False)
+        self.assertTrue(claims['active'])
+        self.assertFalse(claims['admin'])
+
+    def test_decode_legacy_hs256(self):
+        current_app.config['JWT_PRIVATE_KEY'] = None
+        auth_token = User.encode_auth_token(5)
+        current_app.config['JWT_PRIVATE_KEY'] = self.private_pem
+        self.assertEqual(User.decode_auth_token(auth_token), 5)
+
+    def test_decode_retired_key(self):
+        current_app.config['JWT_PRIVATE_KEY'] = self.retired_pem
+        current_app.config['JWT_KEY_ID'] = 'test-1'
+        auth_token = User.encode_auth_token(5)
+        current_app.config['JWT_PRIVATE_KEY'] = self.private_pem
+        current_app.config['JWT_KEY_ID'] = 'test-2'
+        self.assertEqual(
+            User.decode_auth_token(auth_token),
+            'Invalid token. Please log in again.')
+        current_app.config['JWT_RETIRED_KEYS'] = {'test-1': self.retired_pem}
+        self.assertEqual(User.decode_auth_token(auth_token), 5)
+
+    def test_decode_forged_token(self):
+        payload = {
+            'exp': datetime.datetime.utcnow() + datetime.timedelta(days=1),
+            'iat': datetime.datetime.utcnow(),
+            'sub': 5,
+        }
+        auth_token = jwt.encode(
+            payload, generate_pem(), algorithm='RS256',
+            headers={'kid': 'test-2'})
+        self.assertEqual(
+            User.decode_auth_token(auth_token),
+            'Invalid token. Please log in again.')
+
+    def test_keys(self):
+        current_app.config['JWT_RETIRED_KEYS'] = {'test-1': self.retired_pem}
+        response = self.client.get('/auth/keys')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age', response.headers['Cache-Control'])
+        self.assertEqual(
+            [key['kid'] for key in data['keys']], ['test-2', 'test-1'])
+        self.assertEqual(data['keys'][0]['alg'], 'RS256')
+
+        user = add_user('test', 'test@test.com', 'greaterthaneight')
+        auth_token = User.encode_auth_token(user.id)
+        key = RSAAlgorithm.from_jwk(json.dumps(data['keys'][0]))
+        claims = jwt.decode(auth_token, key=key, algorithms=['RS256'])
+        self.assertEqual(claims['sub'], user.id)
+
+    def test_keys_hs256(self):
+        current_app.config['JWT_PRIVATE_KEY'] = None
+        response = self.client.get('/auth/keys')
+        data = json.loads(response.data.decode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['keys'], [])
+
+    def test_login_claims(self):
+        add_user('test', 'test@test.com', 'greaterthaneight')
+        response = self.client.post(
+            '/auth/login',
+            data=json.dumps({
+                'email': 'test@test.com',
+                'password': 'greaterthaneight'
+            }),
+            content_type='application/json'
+        )
+        auth_token = json.loads(response.data.decode())['auth_token']
+        claims = jwt.decode(auth_token, verify=False)
+        self.assertTrue(claims['active'])
+        self.assertFalse(claims['admin'])
+        response = self.client.get(
+            '/auth/status',
+            headers={'Authorization': f'Bearer {auth_token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import unittest
+
+from project import db
+from project.api.models import User
+from project.tests.base import BaseTestCase
+from project.tests.utils import add_user, count_queries
+
+
+class TestQueryCounts(BaseTestCase):
+    """Authenticated endpoints load the current user once per request."""
+
+    def login(self, admin=False):
+        user = add_user('test', 'test@test.com', 'greaterthaneight')
+        if admin:
+            user.admin = True
+            db.session.commit()
+        resp_login = self.client.post(
+            '/auth/login',
+            data=json.dumps({
+                'email': 'test@test.com',
+                'password': 'greaterthaneight'
+            }),
+            content_type='application/json'
+        )
+        token = json.loads(resp_login.data.decode())['auth_token']
+        return {'Authorization': f'Bearer {token}'}
+
+    def assertUserLoadedOnce(self, statements):
+        user_queries = [
+            statement for statement in statements
+            if statement.lstrip().startswith('SELECT') and
+            User.__tablename__ in statement
+        ]
+        self.assertEqual(len(user_queries), 1, user_queries)
+
+    def test_status(self):
+        headers = self.login()
+        with count_queries() as statements:
+            response = self.client.get('/auth/status', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertUserLoadedOnce(statements)
+        self.assertEqual(len(statements), 1)
+
+    def test_logout(self):
+        headers = self.login()
+        with count_queries() as statements:
+            response = self.client.get('/auth/logout', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(statements), 1)
+
+    def test_metrics(self):
+        headers = self.login(admin=True)
+        with count_queries() as statements:
+            response = self.client.get('/users/metrics', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(statements), 1)
+
+    def test_add_user(self):
+        headers = self.login(admin=True)
+        with count_queries() as statements:
+            response = self.client.post(
+                '/users',
+                data=json.dumps({
+                    'username': 'test_user',
+                    'email': 'test_user@mail.com',
+                    'password': 'greaterthaneight',
+                }),
+                content_type='application/json',
+                headers=headers
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertUserLoadedOnce(
+            [s for s in statements if 'users.email =' not in s])
+        self.assertEqual(len(statements), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+import random
+import unittest
+
+from project.api.models import User
+from project.hashing import hash_password
+from project.seed import (
+    seed_users, synthetic_users, write_exercises, write_scores
+)
+from project.tests.base import BaseTestCase
+
+
+class TestSeed(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        pw_hash, _ = hash_password('greaterthaneight', 4)
+        self.hash_passwords = lambda n: [pw_hash] * n
+
+    def test_synthetic_users(self):
+        users = list(synthetic_users(100))
+        self.assertEqual(len({username for username, _ in users}), 100)
+        self.assertEqual(len({email for _, email in users}), 100)
+        self.assertEqual(users, list(synthetic_users(100)))
+        self.assertTrue(users[0][0].endswith('1'))
+        self.assertTrue(users[0][1].startswith(users[0][0] + '@'))
+
+    def test_seed_users(self):
+        chunks = list(seed_users(
+            synthetic_users(5), self.hash_passwords, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(User.query.count(), 5)
+        user = User.query.get(chunks[0][0])
+        self.assertTrue(user.active)
+        self.assertFalse(user.admin)
+        self.assertTrue(user.created_date)
+
+        response = self.client.post(
+            '/auth/login',
+            data=json.dumps({
+                'email': user.email,
+                'password': 'greaterthaneight'
+            }),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_seed_users_again(self):
+        list(seed_users(synthetic_users(3), self.hash_passwords))
+        chunks = list(seed_users(synthetic_users(4), self.hash_passwords))
+        self.assertEqual([len(chunk) for chunk in chunks], [1])
+        self.assertEqual(User.query.count(), 4)
+
+    def test_write_datasets(self):
+        exercises = io.StringIO()
+        write_exercises(exercises, 4)
+        rows = list(csv.reader(io.StringIO(exercises.getvalue())))
+        self.assertEqual([row[0] for row in rows], ['1', '2', '3', '4'])
+        self.assertEqual(rows[0][2:], ['reverse("racecar1")', '1racecar'])
+
+        scores = io.StringIO()
+        write_scores(scores, [7, 8], 4, 3, random.Random(0))
+        rows = list(csv.reader(io.StringIO(scores.getvalue())))
+        self.assertEqual(len(rows), 6)
+        for user_id in ('7', '8'):
+            exercise_ids = [row[1] for row in rows if row[0] == user_id]
+            self.assertEqual(len(set(exercise_ids)), 3)
+        self.assertTrue(all(row[2] in ('t', 'f') for row in rows))
+
+
+if __name__ == '__main__':
+    unittest.main()
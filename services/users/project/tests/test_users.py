@@ -230,6 +230,56 @@ class TestUserService(BaseTestCase):
             self.assertIn('success', data['status'])
             self.assertTrue(data['data']['users'][1]['active'])
             self.assertFalse(data['data']['users'][1]['admin'])
+            self.assertNotIn('next', data['data'])
+
+    def test_all_users_paginated(self):
+        for i in range(3):
+            add_user(f'test_user{i}', f'test_user{i}@mail.com',
+                     'greaterthaneight')
+
+        with self.client:
+            response = self.client.get('/users?limit=2')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(data['data']['users']), 2)
+            self.assertEqual(
+                'test_user0', data['data']['users'][0]['username'])
+            self.assertEqual(
+                'test_user1', data['data']['users'][1]['username'])
+            after = data['data']['next']
+            self.assertEqual(after, data['data']['users'][1]['id'])
+
+            response = self.client.get(f'/users?limit=2&after={after}')
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(data['data']['users']), 1)
+            self.assertEqual(
+                'test_user2', data['data']['users'][0]['username'])
+            self.assertIsNone(data['data']['next'])
+
+    def test_all_users_invalid_pagination(self):
+        with self.client:
+            for query in ('limit=blah', 'limit=0', 'after=-1'):
+                response = self.client.get(f'/users?{query}')
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('fail', data['status'])
+                self.assertIn(
+                    'Invalid pagination parameters.', data['message'])
+
+    def test_all_users_ndjson(self):
+        add_user('test_user', 'test_user@mail.com', 'greaterthaneight')
+        add_user('test_user2', 'test_user2@mail.com', 'greaterthaneight')
+
+        response = self.client.get('/users?format=ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.data.decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        users = [json.loads(line) for line in lines]
+        self.assertEqual('test_user', users[0]['username'])
+        self.assertEqual('test_user2', users[1]['username'])
+        self.assertNotIn('password', users[0])
 
     def test_add_user_inactive(self):
         add_user('test', 'test@test.com', 'greaterthaneight')
@@ -285,6 +335,32 @@ class TestUserService(BaseTestCase):
                 data['message']
             )
 
+    def test_metrics(self):
+        resp_login = self.authenticate_admin_user()
+        auth_token = json.loads(resp_login.data.decode())['auth_token']
+        with self.client:
+            response = self.client.get(
+                '/users/metrics',
+                headers={'Authorization': f'Bearer {auth_token}'}
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('success', data['status'])
+            self.assertIn('queue_depth', data['data']['hashing'])
+            self.assertIn('hash_time_avg', data['data']['hashing'])
+
+    def test_metrics_not_admin(self):
+        resp_login = self.authenticate_user()
+        auth_token = json.loads(resp_login.data.decode())['auth_token']
+        with self.client:
+            response = self.client.get(
+                '/users/metrics',
+                headers={'Authorization': f'Bearer {auth_token}'}
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 401)
+            self.assertIn('fail', data['status'])
+
 
 if __name__ == '__main__':
     unittest.main()
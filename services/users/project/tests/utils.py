@@ -1,3 +1,7 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
 from project import db
 from project.api.models import User
 
@@ -17,3 +21,18 @@ def add_admin(username, email, password):
     db.session.add(user)
     db.session.commit()
     return user
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(
+            db.engine, 'before_cursor_execute', before_cursor_execute)